@@ -15,8 +15,13 @@ class AlignmentLEDs(Command):
         self.leds.set_state("align")
 
     def execute(self):
-        self.leds.set_misalignment(self.drive.get_auto_lookahead_heading(
-                                [16.5, 5.53], 0.3), self.drive.get_pose().rotation().degrees())
+        current_heading = self.drive.get_pose().rotation().degrees()
+        solution = self.drive.solve_shot([16.5, 5.53])
+        if solution.valid:
+            self.leds.set_misalignment(solution.heading, current_heading)
+        else:
+            # No shot from here, show the strip fully off target.
+            self.leds.set_misalignment(current_heading + 180, current_heading)
 
     def end(self, interrupted: bool):
         self.leds.set_state("default")
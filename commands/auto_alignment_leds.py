@@ -2,7 +2,8 @@ from commands2 import Command
 
 from subsystems.command_swerve_drivetrain import CommandSwerveDrivetrain
 from subsystems.ledsubsystem import LEDs
-from wpilib import DriverStation, SendableChooser
+from wpilib import SendableChooser
+from helpers.field_context import field
 from math import cos, sin, sqrt, copysign
 from wpimath.units import degreesToRadians
 from wpimath.geometry import Pose2d, Translation2d, Rotation2d
@@ -24,10 +25,7 @@ class AutoAlignmentLEDs(Command):
     def initialize(self):
         self.leds.set_state("align")
         self.start = self.selector.getSelected()
-        if DriverStation.getAlliance() == DriverStation.Alliance.kRed:
-            alliance = "red"
-        else:
-            alliance = "blue"
+        alliance = field.side
         if self.start == "B" and alliance == "red":
             self.start_coords = [15.18, 5.55, 180, 90.0001]
         elif self.start == "A" and alliance == "red":
@@ -2,15 +2,23 @@ from commands2 import Command, button
 
 from subsystems.command_swerve_drivetrain import CommandSwerveDrivetrain
 from subsystems.utilsubsystem import UtilSubsystem
-from phoenix6 import swerve
-from wpimath.controller import PIDController
+from phoenix6 import swerve, utils
 from generated.tuner_constants import TunerConstants
-from wpimath.units import degreesToRadians, radiansToDegrees, metersToInches
-from math import sqrt, pow, cos, sin, atan2
-from wpilib import DriverStation, SmartDashboard
+from wpimath.units import metersToInches
+from math import atan2, cos, pi, sin
+from wpilib import SmartDashboard
+from constants import AlignmentConstants, LoopConstants, VisionConstants
+from helpers.alignment_controller import AlignmentController, acceleration_limits
+from helpers.field_context import field
 
 
 class AutoAlignmentMultiFeedback(Command):
+    """
+    Lines the robot up on the nearest reef face's scoring line while the driver drives along it. Lateral and
+    heading errors are closed by an AlignmentController; the lateral error blends odometry with the face's tag
+    whenever an alignment camera sees it.
+    """
+
     def __init__(self, drive: CommandSwerveDrivetrain, util: UtilSubsystem,
                  joystick: button.CommandXboxController, flipped: bool):
         super().__init__()
@@ -18,145 +26,102 @@ class AutoAlignmentMultiFeedback(Command):
         self.joystick = joystick
         self.util = util
         self.flipped = flipped
-
-        self.forward_request = (swerve.requests.RobotCentric()
-                                .with_drive_request_type(swerve.SwerveModule.DriveRequestType.VELOCITY)
-                                .with_velocity_y(0))
-
-        self.rotate_controller = PIDController(0.5, 0, 0, 0.04)
-        self.rotate_controller.enableContinuousInput(-180, 180)
-        self.x_controller = PIDController(0.65, 0, 0, 0.04)  # 0.65, 0.05, 0
-        self.closing_controller = PIDController(0.03, 0, 0, 0.04)
+        self.addRequirements(drive)
+
+        self.align_request = (swerve.requests.FieldCentric()
+                              .with_drive_request_type(swerve.SwerveModule.DriveRequestType.VELOCITY)
+                              .with_forward_perspective(swerve.requests.ForwardPerspectiveValue.BLUE_ALLIANCE))
+
+        max_speed, max_acceleration, max_angular_speed, max_angular_acceleration = acceleration_limits(drive.config)
+        self.controller = AlignmentController(
+            max_speed * AlignmentConstants.speed_fraction, max_acceleration * AlignmentConstants.acceleration_fraction,
+            max_angular_speed * AlignmentConstants.speed_fraction,
+            max_angular_acceleration * AlignmentConstants.acceleration_fraction,
+            AlignmentConstants.lateral_kp, AlignmentConstants.heading_kp, AlignmentConstants.odometry_std_dev,
+            AlignmentConstants.vision_std_dev, AlignmentConstants.vision_std_dev_per_meter,
+            VisionConstants.target_timeout, AlignmentConstants.blend_rate, LoopConstants.period)
         self.target = [0, 0]
+        self.face = None
         self.lockout_tag = 0
 
     def initialize(self):
+        # Only the tag on the chosen reef face is trusted until the command ends.
         self.target = self.get_closest_target()
-        if DriverStation.getAlliance() == DriverStation.Alliance.kRed:
-            self.drive.set_used_tags("red_reef")
-        else:
-            self.drive.set_used_tags("blue_reef")
-
-    def execute(self):
         self.drive.set_lockout_tag(self.lockout_tag)
-        SmartDashboard.putNumberArray("Used Tags", self.drive.used_tags)
-        y_move = self.joystick.getLeftY() * -1
+        SmartDashboard.putNumberArray("Used Tags", self.drive.get_used_tags())
 
         current_pose = self.drive.get_pose()
-        a = self.target[0] - current_pose.x
-        b = self.target[1] - current_pose.y
-
-        theta = radiansToDegrees(atan2(b, a))
-
-        if theta < 0:
-            theta = 360 + theta
-
-        if self.flipped:
-            theta += 180
-            y_move = y_move * -1
+        estimate = self.drive.kinematic_estimator.estimate
+        normal = self.face.normal
+        self.controller.reset(self.face.signed_distance(current_pose.x, current_pose.y),
+                              estimate.vx * normal[0] + estimate.vy * normal[1],
+                              current_pose.rotation().radians(), self.get_line_heading(), estimate.omega)
 
-        current_heading = current_pose.rotation().degrees()
-        if current_heading < 0:
-            current_heading = 360 + current_heading
-
-        rotate_output = self.rotate_controller.calculate(current_heading, theta)
-
-        if self.drive.tag_seen and self.drive.target_id == self.lockout_tag:
-            x_output = self.closing_controller.calculate(self.drive.target_yaw, 0)
-        else:
-            x_output = self.x_controller.calculate(self.get_vector_to_line(current_pose, self.target[2]), 0)
-        # else:
-        #     x_output = 0
-
-        if -0.005 < x_output < 0.005:
-            x_output = 0
-
-        self.drive.apply_request(lambda: (self.forward_request
-                                          .with_velocity_y(x_output * TunerConstants.speed_at_12_volts)
-                                          .with_rotational_rate(rotate_output)
-                                          .with_velocity_x(y_move * TunerConstants.speed_at_12_volts * 0.35))).schedule()
+    def execute(self):
+        face = self.face
+        current_pose = self.drive.get_pose()
+        odometry_error = face.signed_distance(current_pose.x, current_pose.y)
+        vision_error, vision_age, vision_range = self.get_vision_error(odometry_error)
+        error = self.controller.blend(odometry_error, vision_error, vision_age, vision_range)
+        lateral_velocity, angular_velocity = self.controller.calculate(error, current_pose.rotation().radians())
+
+        forward = self.joystick.getLeftY() * -1 * TunerConstants.speed_at_12_volts * AlignmentConstants.forward_scale
+        normal = face.normal
+        direction = face.direction
+        self.drive.set_request_slot(self.align_request
+                                    .with_velocity_x(lateral_velocity * normal[0] + forward * direction[0])
+                                    .with_velocity_y(lateral_velocity * normal[1] + forward * direction[1])
+                                    .with_rotational_rate(angular_velocity))
+
+        lateral, along_track = self.get_line_errors(current_pose)
+        SmartDashboard.putString("Perceived Alignment Error", str(metersToInches(abs(lateral))) + "in")
+        SmartDashboard.putNumber("Alignment Along Track (in)", metersToInches(along_track))
+        SmartDashboard.putNumber("Alignment Vision Weight", self.controller.vision_weight)
+        SmartDashboard.putNumber("Alignment Time To Aligned (s)", self.controller.time_to_aligned)
 
     def end(self, interrupted: bool):
-        self.drive.apply_request(lambda: self.forward_request).withTimeout(0.02).schedule()
+        self.drive.release_request_slot(self.align_request
+                                        .with_velocity_x(0)
+                                        .with_velocity_y(0)
+                                        .with_rotational_rate(0))
         self.drive.set_used_tags("all")
         # self.arm.set_state("stow")
 
-    def get_closest_target_coordinates(self, current_pose, alpha) -> [float, float]:
-        """When given x, output y."""
-        y1 = self.target[1]
-        x1 = self.target[0]
-        c = 2
-
-        y2 = y1 + c * sin(degreesToRadians(alpha))
-        x2 = x1 + c * cos(degreesToRadians(alpha))
-        m = (y2 - y1) / (x2 - x1)
-        b = y2 - (m * x2)
-
-        xmin = (current_pose.x + (m * current_pose.y) - (b * m)) / (pow(m, 2) + 1)
-        ymin = ((-1 * m * (-1 * current_pose.x - (m * current_pose.y))) + b) / (pow(m, 2) + 1)
-
-        if alpha > 180:
-            ymin = current_pose.y - (ymin - current_pose.y)
-        return xmin, ymin
-
-    def get_point_on_line(self, x: float, alpha) -> float:
-        y2 = self.target[1]
-        x2 = self.target[0]
-        c = 2
-
-        y1 = y2 - c * cos(degreesToRadians(alpha))
-        x1 = x2 - c * sin(degreesToRadians(alpha))
-        m = (y2 - y1) / (x2 - x1)
-        b = y2 - (m * x2)
-
-        return (m * x) + b
-
-    def get_distance_to_line(self, current_pose, alpha) -> float:
-        y1 = self.target[1]
-        x1 = self.target[0]
-        c = 2
-
-        y2 = y1 + c * sin(degreesToRadians(alpha))
-        x2 = x1 + c * cos(degreesToRadians(alpha))
-        m = (y2 - y1) / (x2 - x1)
-        b = y2 - (m * x2)
-
-        return abs((-1 * m * current_pose.x) + current_pose.y - b) / sqrt(pow(-1 * m, 2) + 1)
-
-    def get_vector_to_line(self, current_pose, alpha):
-        xmin, ymin = self.get_closest_target_coordinates(current_pose, alpha)
-
-        SmartDashboard.putString("Perceived Alignment Error",
-                                 str(metersToInches(self.get_distance_to_line(current_pose, alpha))) + "in")
-        if not self.flipped:
-            if ymin > current_pose.y:
-                return -1 * self.get_distance_to_line(current_pose, alpha)
-            elif ymin < current_pose.y:
-                return self.get_distance_to_line(current_pose, alpha)
-            else:
-                return 0
-        else:
-            if ymin < current_pose.y:
-                return -1 * self.get_distance_to_line(current_pose, alpha)
-            elif ymin > current_pose.y:
-                return self.get_distance_to_line(current_pose, alpha)
-            else:
-                return 0
-
-    def get_closest_target(self) -> [float, float, float, float, float]:
-        pose = [self.drive.get_pose().x, self.drive.get_pose().y]
-        mini = 100000
-
-        if DriverStation.getAlliance() == DriverStation.Alliance.kRed:
-            possible_sides = self.util.scoring_sides_red
-        else:
-            possible_sides = self.util.scoring_sides_blue
-
-        for i in possible_sides:
-            c = sqrt(((i[0] - pose[0]) * (i[0] - pose[0])) + ((i[1] - pose[1]) * (i[1] - pose[1])))
-            if c < mini:
-                mini = c
-                mini_target = [i[0], i[1], i[2]]
-                self.lockout_tag = i[3]
-
-        return [mini_target[0], mini_target[1], mini_target[2][0][2]]
+    def get_line_heading(self) -> float:
+        """The heading (radians) that faces along the scoring line, into the reef or away from it when flipped."""
+        heading = atan2(self.face.direction[1], self.face.direction[0])
+        return heading + pi if self.flipped else heading
+
+    def get_vision_error(self, odometry_error: float) -> tuple[float | None, float, float]:
+        """Returns (lateral error from the face's tag, age of the frame, range to the tag), error None if the tag
+        is not in view. The robot position the tag implies at capture is corrected by the odometry movement since,
+        so the frame's latency does not show up as error."""
+        target = self.drive.get_visible_target(self.lockout_tag)
+        tag = self.drive.tag_index.get(self.lockout_tag)
+        if target is None or tag is None:
+            return None, 0.0, 0.0
+        capture_pose = self.drive.get_pose_at(target.timestamp)
+        heading = capture_pose.rotation().radians()
+        c, s = cos(heading), sin(heading)
+        tag_x = tag.pose2d.x
+        tag_y = tag.pose2d.y
+        vision_error = self.face.signed_distance(tag_x - (c * target.x - s * target.y),
+                                                 tag_y - (s * target.x + c * target.y))
+        moved = odometry_error - self.face.signed_distance(capture_pose.x, capture_pose.y)
+        return vision_error + moved, utils.get_current_time_seconds() - target.timestamp, target.range
+
+    def get_line_errors(self, current_pose) -> tuple[float, float]:
+        """Returns (lateral, along-track) distance to the target face's approach line. Lateral is positive with
+        the robot to the left of the line as seen from the robot's driving direction, so it flips when scoring
+        flipped."""
+        lateral = self.face.signed_distance(current_pose.x, current_pose.y)
+        if self.flipped:
+            lateral = -lateral
+        return lateral, self.face.along_track(current_pose.x, current_pose.y)
+
+    def get_closest_target(self) -> [float, float, float]:
+        current_pose = self.drive.get_pose()
+        face = self.util.scoring.nearest_face(field.side, current_pose.x, current_pose.y)
+        self.face = face
+        self.lockout_tag = face.tag_id
+        return [face.x, face.y, face.heading]
@@ -23,7 +23,7 @@ class CheckDrivetrain(Command):
         self.br_steer_warning = Alert("BACK RIGHT STEER ABNORMAL CURRENT DRAW", Alert.AlertType.kWarning)
 
         self.drive = drive
-        # self.addRequirements(drive)
+        self.addRequirements(drive)
         self.timer = timer
         self.drive_forward = swerve.requests.RobotCentric()\
             .with_drive_request_type(swerve.SwerveModule.DriveRequestType.OPEN_LOOP_VOLTAGE)\
@@ -66,17 +66,17 @@ class CheckDrivetrain(Command):
 
     def execute(self):
         if not self.check_time(2):
-            self.drive.apply_request(lambda: self.drive_forward).schedule()
+            self.drive.set_request_slot(self.drive_forward)
         if not self.check_time(4) and self.check_time(2):
-            self.drive.apply_request(lambda: self.drive_reverse).schedule()
+            self.drive.set_request_slot(self.drive_reverse)
         if not self.check_time(6) and self.check_time(4):
-            self.drive.apply_request(lambda: self.drive_left).schedule()
+            self.drive.set_request_slot(self.drive_left)
         elif not self.check_time(8) and self.check_time(6):
-            self.drive.apply_request(lambda: self. drive_right).schedule()
+            self.drive.set_request_slot(self.drive_right)
         elif not self.check_time(10) and self.check_time(8):
-            self.drive.apply_request(lambda: self.rotate_cw).schedule()
+            self.drive.set_request_slot(self.rotate_cw)
         elif not self.check_time(12) and self.check_time(10):
-            self.drive.apply_request(lambda: self.rotate_ccw).schedule()
+            self.drive.set_request_slot(self.rotate_ccw)
 
         for i in range(0, 4):
             self.drive_currents[i].append(self.drive.modules[i].drive_motor.get_stator_current().value_as_double)
@@ -89,7 +89,7 @@ class CheckDrivetrain(Command):
             return False
 
     def end(self, interrupted: bool):
-        self.drive.apply_request(lambda: swerve.requests.SwerveDriveBrake()).schedule()
+        self.drive.release_request_slot(self.drive.brake_request)
 
         print("Front Left Drive Max Current Draw: " + str(max(self.drive_currents[0])))
         print("Front Left Steer Max Current Draw: " + str(max(self.steer_currents[0])))
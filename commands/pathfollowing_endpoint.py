@@ -3,17 +3,21 @@ from subsystems.command_swerve_drivetrain import CommandSwerveDrivetrain
 from phoenix6 import swerve
 from wpimath.controller import PIDController
 from wpimath.geometry import Rotation2d
-from math import pi, cos, sin
+from math import pi
 from generated.tuner_constants import TunerConstants
-from wpilib import DriverStation
-from wpimath.units import degreesToRadians
+from helpers.field_context import field
 
 
 class PathfollowingEndpointClose(Command):
     def __init__(self, drive: CommandSwerveDrivetrain, endpoint: [float, float, float]):
         super().__init__()
         self.drive = drive
-        self.endpoint = [endpoint[0], endpoint[1], Rotation2d.fromDegrees(endpoint[2])]
+        # Both alliances' endpoints are worked out once: red rotates the position about the field center, blue
+        # turns the heading around.
+        red_x, red_y = field.flip_point(endpoint[0], endpoint[1])
+        self.endpoints = ([endpoint[0], endpoint[1], Rotation2d.fromDegrees(endpoint[2] + 180)],
+                          [red_x, red_y, Rotation2d.fromDegrees(endpoint[2])])
+        self.endpoint = self.endpoints[0]
 
         self.drive_request = (swerve.requests.FieldCentricFacingAngle()
                               .with_drive_request_type(swerve.SwerveModule.DriveRequestType.VELOCITY))
@@ -27,13 +31,7 @@ class PathfollowingEndpointClose(Command):
         # self.addRequirements(drive)
 
     def initialize(self):
-        if DriverStation.getAlliance() == DriverStation.Alliance.kRed:
-            x1 = ((self.endpoint[0] - 8.775) * cos(degreesToRadians(180))) - ((self.endpoint[1] - 4.007) * sin(degreesToRadians(180))) + 8.775
-            y1 = ((self.endpoint[0] - 8.775) * sin(degreesToRadians(180))) + ((self.endpoint[1] - 4.007) * cos(degreesToRadians(180))) + 4.007
-            self.endpoint[0] = x1
-            self.endpoint[1] = y1
-        else:
-            self.endpoint[2] = Rotation2d.fromDegrees(self.endpoint[2].degrees() + 180)
+        self.endpoint = self.endpoints[1 if field.is_red else 0]
 
         print("PATH CLOSING ENGAGED")
 
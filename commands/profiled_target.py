@@ -12,6 +12,7 @@ class ProfiledTarget(Command):
         super().__init__()
         self.drive = drive
         self.target = target
+        self.addRequirements(drive)
 
         self.rotation_request = (swerve.requests.RobotCentric()
                                  .with_velocity_y(0)
@@ -30,8 +31,7 @@ class ProfiledTarget(Command):
 
         rotate_output = self.rotation_controller.calculate(current_pose.rotation().degrees(), rotation_target)
 
-        self.drive.apply_request(lambda: (self.rotation_request
-                                          .with_rotational_rate(rotate_output))).schedule()
+        self.drive.set_request_slot(self.rotation_request.with_rotational_rate(rotate_output))
 
         if self.rotation_controller.atSetpoint():
             print("PROFILED CONTROLLER AT SETPOINT")
@@ -39,4 +39,4 @@ class ProfiledTarget(Command):
             print("PROFILED CONTROLLER NOT AT SETPOINT")
 
     def end(self, interrupted: bool):
-        self.drive.apply_request(lambda: self.rotation_request).withTimeout(0.02).schedule()
+        self.drive.release_request_slot(self.rotation_request.with_rotational_rate(0))
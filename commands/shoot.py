@@ -2,7 +2,7 @@ from commands2 import Command
 from subsystems.command_swerve_drivetrain import CommandSwerveDrivetrain
 from subsystems.armsubsystem import ArmSubsystem
 from subsystems.ledsubsystem import LEDs
-from wpilib import DriverStation
+from helpers.field_context import field
 
 class Shoot(Command):
 
@@ -46,13 +46,15 @@ class Shoot(Command):
         self.arm.set_state("stow")
 
     def check_to_use(self):
-        if DriverStation.getAlliance() == DriverStation.Alliance.kRed:
-            if self.drive.get_pose().x >= 13.067:
-                return -90 < self.drive.get_pose().rotation().degrees() < 90
+        pose = self.drive.get_pose()
+        heading = pose.rotation().degrees()
+        if field.is_red:
+            if pose.x >= field.get("shoot_side_x"):
+                return -90 < heading < 90
             else:
-                return not -90 < self.drive.get_pose().rotation().degrees() < 90
+                return not -90 < heading < 90
         else:
-            if self.drive.get_pose().x <= 4.484:
-                return not -90 < self.drive.get_pose().rotation().degrees() < 90
+            if pose.x <= field.get("shoot_side_x"):
+                return not -90 < heading < 90
             else:
-                return -90 < self.drive.get_pose().rotation().degrees() < 90
\ No newline at end of file
+                return -90 < heading < 90
\ No newline at end of file
@@ -16,7 +16,7 @@ class WheelRadiusCalculator(Command):
         self.drive_request = (swerve.requests.RobotCentric()
                               .with_drive_request_type(swerve.SwerveModule.DriveRequestType.VELOCITY))
 
-        # self.addRequirements(drive)
+        self.addRequirements(drive)
 
         self.fl = 0
         self.fr = 0
@@ -41,10 +41,10 @@ class WheelRadiusCalculator(Command):
         self.start_angle = self.drive.get_pose().rotation().degrees()
 
     def execute(self):
-        self.drive.apply_request(lambda: (self.drive_request
-                                          .with_velocity_x(0)
-                                          .with_velocity_y(0)
-                                          .with_rotational_rate(0.1 * rotationsToRadians(0.75)))).schedule()
+        self.drive.set_request_slot(self.drive_request
+                                    .with_velocity_x(0)
+                                    .with_velocity_y(0)
+                                    .with_rotational_rate(0.1 * rotationsToRadians(0.75)))
 
     def isFinished(self) -> bool:
         if self.start_angle - 0.1 < self.drive.get_pose().rotation().degrees() <= self.start_angle + 0.1 and self.timer.get() - 2 > self.start_time:
@@ -53,8 +53,7 @@ class WheelRadiusCalculator(Command):
             return False
 
     def end(self, interrupted: bool):
-        self.drive.apply_request(lambda: self.drive_request.with_rotational_rate(0)).withTimeout(
-            0.02).schedule()
+        self.drive.release_request_slot(self.drive_request.with_rotational_rate(0))
 
         if not interrupted:
             fl_dist = abs(self.drive.get_module(0).drive_motor.get_position().value_as_double) - self.fl
@@ -8,6 +8,13 @@ from wpimath.geometry import Translation2d
 from wpimath.kinematics import SwerveDrive4Kinematics
 
 
+class LoopConstants:
+    period = 0.02  # Main robot loop, drivetrain control runs every loop.
+    led_period = 0.04
+    vision_period = 1 / 15  # Match the camera frame rate.
+    dashboard_period = 0.1
+
+
 class OIConstants:
     kDriverControllerPort = 0
     kOperatorControllerPort = 1
@@ -44,3 +51,110 @@ class AutoConstants:
     x_pid = [5, 0, 0]
     y_pid = [5, 0, 0]
 
+
+
+class ProfilerConstants:
+    enabled = True
+    window = 128  # Samples kept per profiled item, about 2.5 seconds of loops.
+
+
+class WatchdogConstants:
+    budget = 0.018  # Seconds of the 20 ms loop before a loop counts as an overrun.
+    shed_after = 3  # Overruns inside the window that start load shedding.
+    window = 1.0
+    hold = 2.0  # Seconds without an overrun before shed work is restored.
+
+
+class EstimatorConstants:
+    # Low-pass time constants (seconds) for the odometry-rate velocity/acceleration estimator. Larger is smoother
+    # but lags more. Zero disables the filter.
+    velocity_time_constant = 0.01
+    acceleration_time_constant = 0.04
+    pose_history_size = 500  # Odometry samples kept for latency compensation, 2 seconds at 250 Hz.
+
+
+class ShotConstants:
+    # Time of flight (seconds) of a game piece against distance to the goal (meters), linearly interpolated and
+    # held at the ends.
+    time_of_flight_table = [(1.0, 0.25), (3.0, 0.35), (6.0, 0.55)]
+    release_delay = 0.1  # Seconds between deciding to shoot and the piece leaving the robot.
+    max_iterations = 5  # Caps the solver's CPU time per call.
+    tolerance = 0.005  # Seconds of time-of-flight change that counts as converged.
+    min_distance = 0.5
+    max_distance = 6.0
+    max_speed = 3.0  # Meters per second, faster shots are never marked valid.
+
+
+class AlignmentConstants:
+    # Reef alignment (helpers.alignment_controller). Limits are fractions of what RobotConfig says the drivetrain
+    # can do, leaving margin for the driver's along-line speed and for the heading.
+    speed_fraction = 0.5
+    acceleration_fraction = 0.6
+    lateral_kp = 2.0  # (m/s) per meter of error left over after the profile's feedforward.
+    heading_kp = 4.0  # (rad/s) per radian.
+    odometry_std_dev = 0.05  # Meters of lateral error in odometry near the reef.
+    vision_std_dev = 0.01  # Meters of lateral error from a fresh tag at zero range.
+    vision_std_dev_per_meter = 0.02
+    blend_rate = 4.0  # Fastest change of the vision weight, per second.
+    forward_scale = 0.35  # Fraction of top speed the driver's stick gives along the line.
+
+
+class FieldConstants:
+    # Alliance-dependent positions, as (blue, red). Headings are in degrees. helpers.field_context caches the
+    # current alliance's values.
+    center = (8.775, 4.007)  # Point the field is rotated about to flip a blue position to red.
+    goal = ((4.485, 4.014), (13.058, 4.014))
+    reset_pose = ((3.273, 4.020, 0), (14.337, 4.020, 180))
+    shoot_side_x = (4.484, 13.067)  # Reef x past which Shoot scores over the back of the robot.
+    # The reef scoring table (helpers.scoring_geometry) was measured on red and mirrors to blue about this
+    # length and width rather than the center above.
+    reef_flip_length = 17.513
+    reef_flip_width = 8.021
+
+
+class VisionConstants:
+    # Every camera on the robot. Position is robot-to-camera in inches (x forward, y left, z up), rotation is roll,
+    # pitch, yaw in degrees. Alignment cameras feed the 2D target yaw used to line up on the reef.
+    cameras = [
+        {"name": "FRONT_ALIGN", "position_in": (5, 0, 6), "rotation_deg": (0, 0, 0), "alignment": True},
+    ]
+    worker_period = 0.01  # Seconds between camera polls on each camera's vision thread.
+    target_timeout = 0.25  # Seconds an alignment camera's last target is still used for 2D targeting.
+    # Reef tags, in the same face order as UtilSubsystem's scoring sides.
+    red_reef_tags = [7, 8, 9, 10, 11, 6]
+    blue_reef_tags = [18, 17, 22, 21, 20, 19]
+    max_queued_frames = 32
+    record = False  # Write every camera result and odometry sample to a .vlog next to the DataLogs for replay.
+    sim_fps = 15
+    sim_resolution = (1280, 800)
+    sim_fov = 75  # Degrees, diagonal.
+    sim_max_skip_time = 0.2  # Seconds, keep below target_timeout so a stationary robot keeps its target.
+    # Fuse vision poses into odometry. Turning this off leaves only the 2D target data and stops the vision threads
+    # running pose estimation.
+    fuse_poses = True
+    # Read the cameras, estimate and screen poses in a separate Python process so vision never competes with the
+    # control loop for the GIL (see helpers.vision_process). Vision frames are not recorded in this mode.
+    use_process = False
+    ring_capacity = 64  # Frames the shared-memory ring holds before the oldest is overwritten.
+    # Stand-in process for testing without cameras: made-up frames at stand_in_fps, each costing stand_in_load
+    # seconds of CPU, reporting a pose near stand_in_pose (x, y meters, heading radians).
+    process_stand_in = False
+    stand_in_fps = 30
+    stand_in_load = 0.005
+    stand_in_pose = (3.0, 4.0, 0.0)
+
+    # Std-dev model for fused poses (see helpers.vision_std_devs), all tunable from the dashboard.
+    xy_std_dev_base = 0.05  # Meters of x/y std-dev for one tag at one meter, robot stopped.
+    theta_std_dev_base = 0.1  # Radians of heading std-dev for multi-tag solves at one meter.
+    speed_std_dev_scale = 0.5  # Extra std-dev fraction per m/s of robot speed.
+    max_ambiguity = 0.2  # Single-tag solves with more pose ambiguity than this are rejected.
+    max_tag_distance = 5.0  # Meters, average tag distance beyond which any solve is rejected.
+    max_single_tag_distance = 4.0
+    max_vision_speed = 4.0  # Meters per second, measurements taken while moving faster are rejected.
+    max_z_error = 0.03  # Meters the estimated pose may sit above or below the floor.
+
+    # Gate comparing fused poses with odometry at the capture time (see helpers.vision_gate), tunable as well.
+    gate_chi_squared = 13.8  # 2-DOF chi-square, 99.9% of good measurements pass.
+    gate_heading = 0.35  # Radians of heading disagreement allowed on multi-tag solves.
+    gate_odometry_std_dev = 0.1  # Meters of odometry drift assumed when normalising the residual.
+    gate_max_consecutive_rejects = 15  # After this many rejections in a row a camera's next pose is trusted.
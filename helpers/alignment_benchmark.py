@@ -0,0 +1,172 @@
+"""
+Measures how fast AutoAlignmentMultiFeedback lines up on the reef. The real drivetrain runs headless in
+simulation: its Phoenix sim thread moves the robot, and SimVision (PhotonVision's VisionSystemSim) renders the
+tags from the simulated pose. From a grid of start poses in front of every red and blue reef face, normal and
+flipped alignment run with the stick centred, and each trial records:
+
+    time       seconds until lateral and heading error are inside tolerance and stay there for --settle
+    overshoot  furthest the robot crossed to the other side of the scoring line
+    failure    no settle within --timeout, or the command picked a different face
+
+The simulation runs in real time, so a full run takes a few minutes; --faces and --alliances cut it down. Run
+from the project root:
+
+    python -m helpers.alignment_benchmark --timeout 4
+"""
+import argparse
+from math import atan2, cos, degrees, pi, radians, sin
+from time import perf_counter, sleep
+
+import hal
+from commands2 import button
+from wpilib.simulation import DriverStationSim
+from wpimath.geometry import Pose2d, Rotation2d
+from wpimath.units import metersToInches
+
+from commands.auto_alignment_multi_feedback import AutoAlignmentMultiFeedback
+from constants import LoopConstants, OIConstants
+from generated.tuner_constants import TunerConstants
+from helpers.field_context import field
+from helpers.scoring_geometry import ScoringFace
+from helpers.sim_vision_benchmark import loop_once
+from subsystems.command_swerve_drivetrain import CommandSwerveDrivetrain
+from subsystems.utilsubsystem import UtilSubsystem
+
+
+class Trial:
+    def __init__(self, face: ScoringFace, flipped: bool, lateral: float, back: float, heading: float):
+        self.face = face
+        self.flipped = flipped
+        self.lateral = lateral
+        self.back = back
+        self.heading = heading
+        self.time: float | None = None
+        self.overshoot = 0.0
+        self.wrong_face = False
+
+    def start_pose(self) -> Pose2d:
+        """Back from the face center along the scoring line, offset sideways and turned off the line heading."""
+        face = self.face
+        x = face.x - self.back * face.direction[0] + self.lateral * face.normal[0]
+        y = face.y - self.back * face.direction[1] + self.lateral * face.normal[1]
+        line_heading = atan2(face.direction[1], face.direction[0]) + (pi if self.flipped else 0)
+        return Pose2d(x, y, Rotation2d(line_heading + radians(self.heading)))
+
+    @property
+    def failed(self) -> bool:
+        return self.time is None or self.wrong_face
+
+
+def set_alliance(red: bool) -> None:
+    """Switch alliance the way a match would: while disabled, then enable."""
+    DriverStationSim.setEnabled(False)
+    DriverStationSim.setAllianceStationId(hal.AllianceStationID.kRed1 if red else hal.AllianceStationID.kBlue1)
+    DriverStationSim.notifyNewData()
+    field.refresh()
+    DriverStationSim.setEnabled(True)
+    DriverStationSim.notifyNewData()
+
+
+def run_trial(trial: Trial, drivetrain: CommandSwerveDrivetrain, util: UtilSubsystem,
+              joystick: button.CommandXboxController, timeout: float, settle: float, lateral_tolerance: float,
+              heading_tolerance: float) -> None:
+    pose = trial.start_pose()
+    drivetrain.reset_pose(pose)
+    for _ in range(int(0.3 / LoopConstants.period)):
+        loop_once(drivetrain)
+        sleep(LoopConstants.period)
+    drivetrain.reset_pose(pose)
+
+    command = AutoAlignmentMultiFeedback(drivetrain, util, joystick, trial.flipped)
+    command.schedule()
+    face = trial.face
+    line_heading = atan2(face.direction[1], face.direction[0]) + (pi if trial.flipped else 0)
+    start_side = 1 if face.signed_distance(pose.x, pose.y) >= 0 else -1
+    start = perf_counter()
+    inside_since = None
+    next_loop = start
+    while perf_counter() - start < timeout:
+        loop_once(drivetrain)
+        if command.face is not None and command.face is not face:
+            trial.wrong_face = True
+            break
+        now = perf_counter() - start
+        current = drivetrain.get_pose()
+        lateral = face.signed_distance(current.x, current.y)
+        turn = current.rotation().radians() - line_heading
+        heading_error = degrees(atan2(sin(turn), cos(turn)))
+        trial.overshoot = max(trial.overshoot, -start_side * lateral)
+        if abs(lateral) < lateral_tolerance and abs(heading_error) < heading_tolerance:
+            if inside_since is None:
+                inside_since = now
+            elif now - inside_since >= settle:
+                trial.time = inside_since
+                break
+        else:
+            inside_since = None
+        next_loop += LoopConstants.period
+        sleep(max(0.0, next_loop - perf_counter()))
+    command.cancel()
+
+
+def report(trials: list[Trial]) -> list[str]:
+    lines = [f"{'alliance':>8} {'face':>4} {'tag':>3} {'mode':>7} {'trials':>6} {'median s':>8} {'max s':>6} "
+             f"{'overshoot in':>12} {'failed':>6}"]
+    groups: dict[tuple, list[Trial]] = {}
+    for trial in trials:
+        face = trial.face
+        groups.setdefault((face.alliance, face.index, face.tag_id, trial.flipped), []).append(trial)
+    groups[("all", "", "", None)] = trials
+    for (alliance, index, tag_id, flipped), group in groups.items():
+        times = sorted(trial.time for trial in group if not trial.failed)
+        median = f"{times[len(times) // 2]:.2f}" if times else "-"
+        worst = f"{times[-1]:.2f}" if times else "-"
+        overshoot = max(trial.overshoot for trial in group)
+        failed = sum(trial.failed for trial in group)
+        mode = "all" if flipped is None else "flipped" if flipped else "normal"
+        lines.append(f"{alliance:>8} {index!s:>4} {tag_id!s:>3} {mode:>7} {len(group):>6} {median:>8} {worst:>6} "
+                     f"{metersToInches(overshoot):>12.2f} {failed:>3}/{len(group):<2}")
+    return lines
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark auto-alignment convergence on every reef face.")
+    parser.add_argument("--alliances", default="red,blue")
+    parser.add_argument("--faces", default="0,1,2,3,4,5", help="face indices in UtilSubsystem's table order")
+    parser.add_argument("--lateral", default="-0.3,0.3", help="start offsets from the scoring line, meters")
+    parser.add_argument("--back", default="0.6", help="start distances back from the face center, meters")
+    parser.add_argument("--heading", default="-15,15", help="start heading offsets from the line, degrees")
+    parser.add_argument("--timeout", type=float, default=4.0)
+    parser.add_argument("--settle", type=float, default=0.2, help="seconds inside tolerance to count as aligned")
+    parser.add_argument("--lateral-tolerance", type=float, default=0.02, help="meters")
+    parser.add_argument("--heading-tolerance", type=float, default=2.0, help="degrees")
+    arguments = parser.parse_args()
+
+    def floats(text: str) -> list[float]:
+        return [float(value) for value in text.split(",")]
+
+    hal.initialize()
+    drivetrain = TunerConstants.create_drivetrain()
+    util = UtilSubsystem()
+    joystick = button.CommandXboxController(OIConstants.kDriverControllerPort)
+
+    trials = []
+    for alliance in arguments.alliances.split(","):
+        set_alliance(alliance == "red")
+        for index in (int(value) for value in arguments.faces.split(",")):
+            face = util.scoring.faces[alliance][index]
+            for flipped in (False, True):
+                for lateral in floats(arguments.lateral):
+                    for back in floats(arguments.back):
+                        for heading in floats(arguments.heading):
+                            trial = Trial(face, flipped, lateral, back, heading)
+                            run_trial(trial, drivetrain, util, joystick, arguments.timeout, arguments.settle,
+                                      arguments.lateral_tolerance, arguments.heading_tolerance)
+                            trials.append(trial)
+
+    for line in report(trials):
+        print(line)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+from math import atan2, cos, hypot, pi, sin
+
+from pathplannerlib.config import RobotConfig
+from wpimath.controller import ProfiledPIDController, ProfiledPIDControllerRadians
+from wpimath.trajectory import TrapezoidProfile, TrapezoidProfileRadians
+
+GRAVITY = 9.81
+
+
+def acceleration_limits(config: RobotConfig) -> tuple[float, float, float, float]:
+    """Returns (max speed, max acceleration, max angular speed, max angular acceleration) of the drivetrain from
+    its PathPlanner config. Acceleration is the smaller of the current-limited drive torque and wheel grip."""
+    module = config.moduleConfig
+    modules = config.numModules
+    radius = max(hypot(location.x, location.y) for location in config.moduleLocations)
+    wheel_force = module.driveMotor.torque(module.driveCurrentLimit) / module.wheelRadiusMeters
+    force = min(modules * wheel_force, module.wheelCOF * config.massKG * GRAVITY)
+    return (module.maxDriveVelocityMPS, force / config.massKG, module.maxDriveVelocityMPS / radius,
+            force * radius / config.MOI)
+
+
+class AlignmentController:
+    """
+    Drives onto a scoring line. Lateral error to the line and heading error to the line's direction each follow
+    a trapezoidal profile (time-optimal under the speed and acceleration limits) with the profile's velocity as
+    feedforward and a P term on the remaining error. The driver keeps control along the line.
+
+    The lateral error is a blend of odometry and vision. Vision is latency-corrected by the caller and weighted
+    against odometry by inverse variance, with vision's variance growing with range and age. The weight is
+    slew-limited so a tag coming into or out of view moves the error smoothly rather than as a step.
+    """
+
+    def __init__(self, max_speed: float, max_acceleration: float, max_angular_speed: float,
+                 max_angular_acceleration: float, lateral_kp: float, heading_kp: float, odometry_std_dev: float,
+                 vision_std_dev: float, vision_std_dev_per_meter: float, vision_timeout: float, blend_rate: float,
+                 period: float):
+        self.lateral_constraints = TrapezoidProfile.Constraints(max_speed, max_acceleration)
+        self.heading_constraints = TrapezoidProfileRadians.Constraints(max_angular_speed, max_angular_acceleration)
+        self.lateral = ProfiledPIDController(lateral_kp, 0, 0, self.lateral_constraints, period)
+        self.heading = ProfiledPIDControllerRadians(heading_kp, 0, 0, self.heading_constraints, period)
+        self.heading.enableContinuousInput(-pi, pi)
+        self._lateral_profile = TrapezoidProfile(self.lateral_constraints)
+        self._heading_profile = TrapezoidProfileRadians(self.heading_constraints)
+
+        self.odometry_variance = odometry_std_dev * odometry_std_dev
+        self.vision_std_dev = vision_std_dev
+        self.vision_std_dev_per_meter = vision_std_dev_per_meter
+        self.vision_timeout = vision_timeout
+        self.max_blend_step = blend_rate * period
+
+        self.vision_weight = 0.0
+        self.lateral_error = 0.0
+        self.heading_error = 0.0
+        self.time_to_aligned = 0.0
+
+    def reset(self, lateral_error: float, lateral_velocity: float, heading: float, line_heading: float,
+              angular_velocity: float) -> None:
+        """Starts both profiles from the robot's current error and velocity."""
+        self.vision_weight = 0.0
+        self.lateral.reset(lateral_error, lateral_velocity)
+        self.lateral.setGoal(0)
+        self.heading.reset(heading, angular_velocity)
+        self.heading.setGoal(line_heading)
+
+    def blend(self, odometry_error: float, vision_error: float | None, vision_age: float,
+              vision_range: float) -> float:
+        """Returns the lateral error to drive on, moving the vision weight at most one blend step."""
+        target_weight = 0.0
+        if vision_error is not None and vision_age < self.vision_timeout:
+            std_dev = (self.vision_std_dev + self.vision_std_dev_per_meter * vision_range) / (
+                    1 - vision_age / self.vision_timeout)
+            vision_variance = std_dev * std_dev
+            target_weight = self.odometry_variance / (self.odometry_variance + vision_variance)
+        step = max(-self.max_blend_step, min(self.max_blend_step, target_weight - self.vision_weight))
+        self.vision_weight += step
+        if self.vision_weight <= 0 or vision_error is None:
+            return odometry_error
+        return odometry_error + self.vision_weight * (vision_error - odometry_error)
+
+    def calculate(self, lateral_error: float, heading: float) -> tuple[float, float]:
+        """Returns the lateral velocity (rate of change of the error) and angular velocity to command."""
+        self.lateral_error = lateral_error
+        lateral_velocity = self.lateral.calculate(lateral_error) + self.lateral.getSetpoint().velocity
+        angular_velocity = self.heading.calculate(heading) + self.heading.getSetpoint().velocity
+
+        goal = self.heading.getGoal().position
+        self.heading_error = atan2(sin(goal - heading), cos(goal - heading))
+        lateral_setpoint = self.lateral.getSetpoint()
+        heading_setpoint = self.heading.getSetpoint()
+        self._lateral_profile.calculate(0, lateral_setpoint, TrapezoidProfile.State(0, 0))
+        self._heading_profile.calculate(0, TrapezoidProfileRadians.State(-self.heading_error,
+                                                                        heading_setpoint.velocity),
+                                        TrapezoidProfileRadians.State(0, 0))
+        self.time_to_aligned = max(self._lateral_profile.totalTime(), self._heading_profile.totalTime())
+        return lateral_velocity, angular_velocity
@@ -0,0 +1,72 @@
+import builtins
+import sys
+from contextlib import contextmanager
+from time import perf_counter
+
+
+class BootProfiler:
+    """
+    Times robot boot. Phases are timed explicitly, imports are timed by wrapping the import statement while
+    tracking is on (times are inclusive, so a package's time also contains everything it imported), and the
+    time from code start to the first enabled loop is kept as the restart-to-drivable number.
+    """
+
+    def __init__(self):
+        self.start_time = perf_counter()
+        self.last_mark = self.start_time
+        self.phases: dict[str, float] = {}
+        self.imports: dict[str, float] = {}
+        self.restart_to_drivable = -1.0
+        self._original_import = None
+
+    def track_imports(self) -> None:
+        if self._original_import is not None:
+            return
+        original_import = builtins.__import__
+        imports = self.imports
+
+        def timed_import(name, globals=None, locals=None, fromlist=(), level=0):
+            if level != 0 or name in sys.modules:
+                return original_import(name, globals, locals, fromlist, level)
+            start = perf_counter()
+            module = original_import(name, globals, locals, fromlist, level)
+            imports[name] = perf_counter() - start
+            return module
+
+        self._original_import = original_import
+        builtins.__import__ = timed_import
+
+    def stop_import_tracking(self) -> None:
+        if self._original_import is not None:
+            builtins.__import__ = self._original_import
+            self._original_import = None
+
+    @contextmanager
+    def phase(self, name: str):
+        start = perf_counter()
+        yield
+        self.phases[name] = perf_counter() - start
+        self.last_mark = perf_counter()
+
+    def mark(self, name: str) -> None:
+        """Record the time since the previous phase or mark as a phase of its own."""
+        now = perf_counter()
+        self.phases[name] = now - self.last_mark
+        self.last_mark = now
+
+    def mark_drivable(self) -> bool:
+        """Record the first enabled loop. Returns True only the first time it is called."""
+        if self.restart_to_drivable >= 0:
+            return False
+        self.restart_to_drivable = perf_counter() - self.start_time
+        return True
+
+    def report(self, slowest_imports: int = 10) -> list[str]:
+        """Returns readable lines for every phase and the slowest imports."""
+        lines = [f"Boot phase {name}: {duration * 1000:.1f}ms" for name, duration in self.phases.items()]
+        ordered = sorted(self.imports.items(), key=lambda item: item[1], reverse=True)
+        lines += [f"Boot import {name}: {duration * 1000:.1f}ms" for name, duration in ordered[:slowest_imports]]
+        return lines
+
+
+boot = BootProfiler()
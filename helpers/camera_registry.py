@@ -0,0 +1,79 @@
+from collections import deque
+
+from ntcore import NetworkTableInstance
+from photonlibpy.photonCamera import PhotonCamera
+from photonlibpy.photonPoseEstimator import PhotonPoseEstimator, PoseStrategy
+from robotpy_apriltag import AprilTagFieldLayout
+from wpilib import Timer
+from wpimath.geometry import Rotation3d, Transform3d, Translation3d
+from wpimath.units import degreesToRadians, inchesToMeters
+
+from helpers.vision_worker import CameraStats, VisionFrame, VisionWorker
+
+
+def robot_to_camera(config: dict) -> Transform3d:
+    """Returns the robot-to-camera transform of a camera config entry."""
+    x, y, z = config["position_in"]
+    roll, pitch, yaw = config["rotation_deg"]
+    return Transform3d(Translation3d(inchesToMeters(x), inchesToMeters(y), inchesToMeters(z)),
+                       Rotation3d(degreesToRadians(roll), degreesToRadians(pitch), degreesToRadians(yaw)))
+
+
+class VisionCamera:
+    """A configured camera with its pose estimator, worker thread and statistics."""
+
+    def __init__(self, index: int, config: dict, field_layout: AprilTagFieldLayout, strategy: PoseStrategy,
+                 queue: deque[VisionFrame], period: float, estimate_poses: bool):
+        self.index = index
+        self.name = config["name"]
+        self.alignment = config["alignment"]
+        self.robot_to_camera = robot_to_camera(config)
+        self.camera = PhotonCamera(self.name)
+        self.estimator = PhotonPoseEstimator(field_layout, strategy, self.camera, self.robot_to_camera)
+        self.stats = CameraStats()
+        self.worker = VisionWorker(index, self.camera, self.estimator, queue, self.stats, period, estimate_poses)
+
+
+class CameraRegistry:
+    """
+    Builds every camera listed in the vision config. Each camera gets its own worker thread, so cameras are read
+    and estimated in parallel, and all of them feed one frame queue that the robot loop drains. The loop only pays
+    for the frames it applies, however many cameras there are.
+    """
+
+    def __init__(self, configs: list[dict], field_layout: AprilTagFieldLayout, strategy: PoseStrategy,
+                 period: float, max_queued: int, estimate_poses: bool, table: str = "Vision"):
+        self.queue: deque[VisionFrame] = deque(maxlen=max_queued)
+        self.cameras = [VisionCamera(i, config, field_layout, strategy, self.queue, period, estimate_poses)
+                        for i, config in enumerate(configs)]
+
+        nt_table = NetworkTableInstance.getDefault().getTable(table)
+        self._stats_publishers = [nt_table.getDoubleArrayTopic(camera.name).publish() for camera in self.cameras]
+        self._last_frames = [0] * len(self.cameras)
+        self._last_publish_time = Timer.getFPGATimestamp()
+
+    def start(self) -> None:
+        for camera in self.cameras:
+            camera.worker.start()
+
+    def drain(self) -> list[VisionFrame]:
+        """Takes every frame the workers have queued, oldest first."""
+        queue = self.queue
+        frames = []
+        while queue:
+            frames.append(queue.popleft())
+        return frames
+
+    def publish_stats(self) -> None:
+        """Publish [frames per second, latency ms, accepted, rejected, processing ms, dropped, gated] for each
+        camera. Rejected counts every pose not fused, gated the ones of those rejected by the odometry gate."""
+        now = Timer.getFPGATimestamp()
+        elapsed = now - self._last_publish_time
+        self._last_publish_time = now
+        for i, camera in enumerate(self.cameras):
+            stats = camera.stats
+            frames = stats.frames
+            fps = (frames - self._last_frames[i]) / elapsed if elapsed > 0 else 0.0
+            self._last_frames[i] = frames
+            self._stats_publishers[i].set([fps, stats.latency * 1000, stats.accepted, stats.rejected,
+                                           stats.processing_time * 1000, stats.dropped_frames, stats.gated])
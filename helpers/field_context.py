@@ -0,0 +1,59 @@
+from wpilib import DriverStation
+
+from constants import FieldConstants
+
+
+class FieldContext:
+    """
+    The current alliance and every alliance-dependent field constant, so hot paths read a cached value rather
+    than calling into the DriverStation and redoing flip math. The alliance can only change while disabled (or
+    before it is first known), so refresh() reads the DriverStation only then and recomputes the current values
+    only when the alliance actually changes. An unknown alliance reads as blue (is_red is False and the blue
+    values are current); code that only treats a known blue alliance as blue compares alliance itself.
+    """
+
+    def __init__(self, center: tuple[float, float]):
+        self.center_x, self.center_y = center
+        self.alliance: DriverStation.Alliance | None = None
+        self.is_red = False
+        self.side = "blue"
+        self._values: dict[str, tuple] = {}
+        self.current: dict[str, object] = {}
+
+    def refresh(self) -> bool:
+        """Re-reads the alliance if it can have changed. Returns True if it did."""
+        if self.alliance is not None and not DriverStation.isDisabled():
+            return False
+        alliance = DriverStation.getAlliance()
+        if alliance == self.alliance:
+            return False
+        self.alliance = alliance
+        self.is_red = alliance == DriverStation.Alliance.kRed
+        self.side = "red" if self.is_red else "blue"
+        index = 1 if self.is_red else 0
+        self.current = {name: values[index] for name, values in self._values.items()}
+        return True
+
+    def add(self, name: str, blue, red=None) -> None:
+        """Registers a constant by its blue and red values. Without a red value, the blue value must be an (x, y)
+        or (x, y, heading) and is flipped to make it."""
+        if red is None:
+            red = self.flip_pose(*blue) if len(blue) == 3 else self.flip_point(*blue)
+        self._values[name] = (blue, red)
+        self.current[name] = red if self.is_red else blue
+
+    def get(self, name: str):
+        return self.current[name]
+
+    def flip_point(self, x: float, y: float) -> tuple[float, float]:
+        """Rotates a point 180 degrees about the field center."""
+        return 2 * self.center_x - x, 2 * self.center_y - y
+
+    def flip_pose(self, x: float, y: float, heading: float) -> tuple[float, float, float]:
+        return 2 * self.center_x - x, 2 * self.center_y - y, (heading + 180) % 360
+
+
+field = FieldContext(FieldConstants.center)
+field.add("goal", *FieldConstants.goal)
+field.add("reset_pose", *FieldConstants.reset_pose)
+field.add("shoot_side_x", *FieldConstants.shoot_side_x)
@@ -0,0 +1,82 @@
+from math import exp
+
+from ntcore import NetworkTableInstance
+
+
+class KinematicEstimate:
+    """One immutable estimate. Replaced as a whole on every update so readers on another thread never see a
+    half-written estimate."""
+
+    def __init__(self, timestamp: float, field: (float, float, float), field_acceleration: (float, float, float),
+                 robot: (float, float, float), robot_acceleration: (float, float, float)):
+        self.timestamp = timestamp
+        self.vx, self.vy, self.omega = field
+        self.ax, self.ay, self.alpha = field_acceleration
+        self.vx_robot, self.vy_robot, self.omega_robot = robot
+        self.ax_robot, self.ay_robot, self.alpha_robot = robot_acceleration
+
+
+class KinematicEstimator:
+    """
+    Filtered velocity and acceleration of the drivetrain, fed by the Phoenix odometry thread (register_telemetry)
+    at the odometry rate. Measured chassis speeds pass through a first-order low-pass, and acceleration is the
+    derivative of the filtered velocity passed through a second low-pass. The filter gain is worked out from the
+    real time between samples, so jitter in the odometry thread does not change the filtering.
+    """
+
+    def __init__(self, velocity_time_constant: float, acceleration_time_constant: float,
+                 table: str = "DriveState"):
+        self.velocity_time_constant = velocity_time_constant
+        self.acceleration_time_constant = acceleration_time_constant
+        self.estimate = KinematicEstimate(-1.0, (0.0, 0.0, 0.0), (0.0, 0.0, 0.0), (0.0, 0.0, 0.0), (0.0, 0.0, 0.0))
+
+        nt_table = NetworkTableInstance.getDefault().getTable(table)
+        self._field_pub = nt_table.getDoubleArrayTopic("FilteredFieldVelocityAcceleration").publish()
+        self._robot_pub = nt_table.getDoubleArrayTopic("FilteredRobotVelocityAcceleration").publish()
+
+    def update(self, state) -> None:
+        """Add a SwerveDriveState sample. Runs on the odometry thread."""
+        previous = self.estimate
+        speeds = state.speeds
+        rotation = state.pose.rotation()
+        cos = rotation.cos()
+        sin = rotation.sin()
+        robot = (speeds.vx, speeds.vy, speeds.omega)
+        field = (speeds.vx * cos - speeds.vy * sin, speeds.vy * cos + speeds.vx * sin, speeds.omega)
+
+        dt = state.timestamp - previous.timestamp
+        if previous.timestamp < 0 or not 0 < dt < 0.5:
+            # First sample or a gap in odometry, restart from the measurement.
+            zero = (0.0, 0.0, 0.0)
+            self.estimate = KinematicEstimate(state.timestamp, field, zero, robot, zero)
+            return
+
+        velocity_gain = self._gain(dt, self.velocity_time_constant)
+        acceleration_gain = self._gain(dt, self.acceleration_time_constant)
+        field, field_acceleration = self._filter(
+            field, (previous.vx, previous.vy, previous.omega), (previous.ax, previous.ay, previous.alpha),
+            dt, velocity_gain, acceleration_gain)
+        robot, robot_acceleration = self._filter(
+            robot, (previous.vx_robot, previous.vy_robot, previous.omega_robot),
+            (previous.ax_robot, previous.ay_robot, previous.alpha_robot), dt, velocity_gain, acceleration_gain)
+
+        self.estimate = KinematicEstimate(state.timestamp, field, field_acceleration, robot, robot_acceleration)
+
+    def publish(self) -> None:
+        """Publish the latest estimate as [vx, vy, omega, ax, ay, alpha]."""
+        e = self.estimate
+        self._field_pub.set([e.vx, e.vy, e.omega, e.ax, e.ay, e.alpha])
+        self._robot_pub.set([e.vx_robot, e.vy_robot, e.omega_robot, e.ax_robot, e.ay_robot, e.alpha_robot])
+
+    @staticmethod
+    def _gain(dt: float, time_constant: float) -> float:
+        if time_constant <= 0:
+            return 1.0
+        return 1 - exp(-dt / time_constant)
+
+    @staticmethod
+    def _filter(measured, velocity, acceleration, dt: float, velocity_gain: float, acceleration_gain: float):
+        filtered = tuple(v + velocity_gain * (m - v) for m, v in zip(measured, velocity))
+        filtered_acceleration = tuple(a + acceleration_gain * ((f - v) / dt - a)
+                                      for f, v, a in zip(filtered, velocity, acceleration))
+        return filtered, filtered_acceleration
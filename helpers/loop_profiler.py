@@ -0,0 +1,145 @@
+from array import array
+from math import ceil
+from time import perf_counter
+from typing import Callable
+
+from commands2 import Command, CommandScheduler, Subsystem
+from ntcore import NetworkTableInstance
+from wpilib.event import EventLoop
+
+
+class RollingTimer:
+    """Fixed-size ring buffer of call durations (in seconds) for a single profiled item."""
+
+    def __init__(self, size: int):
+        self.size = size
+        self.samples = array("d", bytes(8 * size))
+        self.index = 0
+        self.count = 0
+        self.last = 0.0
+        self.stamp = -1
+
+    def add(self, duration: float, stamp: int) -> None:
+        """Store a new duration taken on loop `stamp`, overwriting the oldest sample once the buffer is full."""
+        self.samples[self.index] = duration
+        self.index += 1
+        if self.index == self.size:
+            self.index = 0
+        if self.count < self.size:
+            self.count += 1
+        self.last = duration
+        self.stamp = stamp
+
+    def summary(self) -> [float, float, float]:
+        """Returns [p50, p99, max] of the stored window in milliseconds."""
+        if self.count == 0:
+            return [0.0, 0.0, 0.0]
+        ordered = sorted(self.samples[:self.count])
+        p50 = ordered[(self.count - 1) // 2]
+        p99 = ordered[ceil(0.99 * self.count) - 1]
+        return [p50 * 1000, p99 * 1000, ordered[-1] * 1000]
+
+
+class TimedEventLoop(EventLoop):
+    """Event loop that forwards polling to another loop and records how long the trigger checks took."""
+
+    def __init__(self, loop: EventLoop, timer: RollingTimer, profiler: "LoopProfiler"):
+        super().__init__()
+        self.loop = loop
+        self.timer = timer
+        self.profiler = profiler
+
+    def poll(self) -> None:
+        start = perf_counter()
+        self.loop.poll()
+        self.timer.add(perf_counter() - start, self.profiler.loop_count)
+
+
+class LoopProfiler:
+    """
+    Times every subsystem periodic, every command lifecycle call and trigger polling inside the
+    CommandScheduler loop. Each item keeps a rolling window of durations and one item's [p50, p99, max]
+    summary (milliseconds) is published to NetworkTables per loop, so the publishing cost stays flat no
+    matter how many items are profiled. NetworkTables topics are captured by DataLogManager when logging is on.
+    """
+
+    def __init__(self, window: int, table: str = "LoopProfiler"):
+        self.window = window
+        self.timers: dict[str, RollingTimer] = {}
+        self._table = NetworkTableInstance.getDefault().getTable(table)
+        self._publishers = []
+        self._publish_index = 0
+        self._loop_start = 0.0
+        self.loop_count = 0
+
+        self.loop_timer = self.get_timer("Loop")
+
+    def get_timer(self, name: str) -> RollingTimer:
+        """Returns the timer for an item, creating it (and its publisher) the first time it is seen."""
+        timer = self.timers.get(name)
+        if timer is None:
+            timer = RollingTimer(self.window)
+            self.timers[name] = timer
+            self._publishers.append((timer, self._table.getDoubleArrayTopic(name).publish()))
+        return timer
+
+    def wrap(self, name: str, function: Callable) -> Callable:
+        """Returns a version of the function that records its run time under the given name."""
+        timer = self.get_timer(name)
+
+        def timed(*args):
+            start = perf_counter()
+            result = function(*args)
+            timer.add(perf_counter() - start, self.loop_count)
+            return result
+
+        return timed
+
+    def attach(self, scheduler: CommandScheduler, subsystems: list[Subsystem]) -> None:
+        """Instrument the given subsystems, every command the scheduler initializes and the active button loop."""
+        for subsystem in subsystems:
+            self.instrument_subsystem(subsystem)
+        scheduler.onCommandInitialize(self.instrument_command)
+        scheduler.setActiveButtonLoop(self.instrument_button_loop(scheduler.getActiveButtonLoop(), "Triggers"))
+
+    def instrument_subsystem(self, subsystem: Subsystem) -> None:
+        subsystem.periodic = self.wrap(subsystem.getName() + ".periodic", subsystem.periodic)
+
+    def instrument_command(self, command: Command) -> None:
+        """Wraps the lifecycle methods of a command. The first initialize() of a command runs before the
+        scheduler reports it, so only later schedules of the same command have their initialize timed."""
+        if getattr(command, "_profiled", False):
+            return
+        name = command.getName()
+        command.initialize = self.wrap(name + ".initialize", command.initialize)
+        command.execute = self.wrap(name + ".execute", command.execute)
+        command.isFinished = self.wrap(name + ".isFinished", command.isFinished)
+        command.end = self.wrap(name + ".end", command.end)
+        command._profiled = True
+
+    def instrument_button_loop(self, loop: EventLoop, name: str) -> EventLoop:
+        return TimedEventLoop(loop, self.get_timer(name), self)
+
+    def start_loop(self) -> None:
+        self.loop_count += 1
+        self._loop_start = perf_counter()
+
+    def end_loop(self) -> None:
+        """Record the total loop time and publish the next item's summary."""
+        self.loop_timer.add(perf_counter() - self._loop_start, self.loop_count)
+
+        timer, publisher = self._publishers[self._publish_index]
+        publisher.set(timer.summary())
+        self._publish_index += 1
+        if self._publish_index == len(self._publishers):
+            self._publish_index = 0
+
+    def slowest_this_loop(self) -> (str, float):
+        """Returns the name and duration of the slowest item that ran during the current loop."""
+        culprit = "unknown"
+        duration = 0.0
+        for name, timer in self.timers.items():
+            if timer is not self.loop_timer and timer.stamp == self.loop_count and timer.last > duration:
+                culprit = name
+                duration = timer.last
+        return culprit, duration
@@ -0,0 +1,63 @@
+from collections import deque
+from typing import Callable
+
+from wpilib import DataLogManager, SmartDashboard, Timer
+
+from helpers.loop_profiler import LoopProfiler
+
+
+class LoopWatchdog:
+    """
+    Checks every robot loop against a time budget. Each overrun is logged with its timestamp and the profiled
+    subsystem or command that took the longest during that loop. When overruns keep happening inside the
+    window, non-critical work is shed until the loop has stayed inside the budget for the hold time.
+    """
+
+    def __init__(self, profiler: LoopProfiler, budget: float, shed_after: int, window: float, hold: float):
+        self.profiler = profiler
+        self.budget = budget
+        self.shed_after = shed_after
+        self.window = window
+        self.hold = hold
+
+        self.shedding = False
+        self.overrun_count = 0
+        self._recent_overruns = deque(maxlen=shed_after)
+        self._last_overrun_time = 0.0
+        self._shed_listeners: list[Callable[[bool], None]] = []
+
+        SmartDashboard.putBoolean("Load Shedding", False)
+        SmartDashboard.putString("Loop Overrun Culprit", "")
+
+    def add_shed_listener(self, listener: Callable[[bool], None]) -> None:
+        """Register a callback that is told when non-critical work should stop (True) or resume (False)."""
+        self._shed_listeners.append(listener)
+
+    def check(self) -> None:
+        """Run once per loop, after the profiler has recorded the loop time."""
+        loop_time = self.profiler.loop_timer.last
+        now = Timer.getFPGATimestamp()
+
+        if loop_time > self.budget:
+            self.overrun_count += 1
+            self._last_overrun_time = now
+            self._recent_overruns.append(now)
+            culprit, culprit_time = self.profiler.slowest_this_loop()
+            message = (f"Loop overrun at {now:.3f}s: {loop_time * 1000:.1f}ms of {self.budget * 1000:.1f}ms, "
+                       f"slowest was {culprit} ({culprit_time * 1000:.1f}ms)")
+            DataLogManager.log(message)
+            SmartDashboard.putString("Loop Overrun Culprit", message)
+
+            if (not self.shedding and len(self._recent_overruns) == self.shed_after
+                    and now - self._recent_overruns[0] <= self.window):
+                self._set_shedding(True)
+        elif self.shedding and now - self._last_overrun_time > self.hold:
+            self._set_shedding(False)
+
+    def _set_shedding(self, shedding: bool) -> None:
+        self.shedding = shedding
+        DataLogManager.log("Load shedding " + ("started" if shedding else "stopped") +
+                           f" at {Timer.getFPGATimestamp():.3f}s")
+        SmartDashboard.putBoolean("Load Shedding", shedding)
+        for listener in self._shed_listeners:
+            listener(shedding)
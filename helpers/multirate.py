@@ -0,0 +1,81 @@
+from math import gcd
+from typing import Callable
+
+
+class RateTask:
+    """A callback that runs once every `divisor` loops, starting on loop `phase`."""
+
+    def __init__(self, name: str, callback: Callable[[], None], divisor: int, phase: int, critical: bool):
+        self.name = name
+        self.callback = callback
+        self.divisor = divisor
+        self.phase = phase
+        self.critical = critical
+
+
+class MultiRateScheduler:
+    """
+    Runs work at multiples of the main loop period. Each task declares its own period, which is rounded to a
+    whole number of loops, and is given the loop phase that collides with the fewest already registered tasks
+    so slow work is staggered instead of piling up on the same loop. Non-critical tasks are skipped while load
+    shedding is active.
+
+    Call tick() at the start of every loop before the command scheduler runs and run() after it.
+    """
+
+    def __init__(self, base_period: float):
+        self.base_period = base_period
+        self.loop_count = 0
+        self.tasks: list[RateTask] = []
+        self.callbacks: list[RateTask] = []
+        self.shedding = False
+
+    def add(self, name: str, callback: Callable[[], None], period: float, critical: bool = False) -> RateTask:
+        """Register a callback that is run by run() at the given period."""
+        task = self._create_task(name, callback, period, critical)
+        self.callbacks.append(task)
+        return task
+
+    def gate(self, name: str, function: Callable[[], None], period: float,
+             critical: bool = False) -> Callable[[], None]:
+        """Returns a wrapper around a function (usually a subsystem periodic) that only calls through when its
+        slot is due. The wrapper is still called every loop by its owner."""
+        task = self._create_task(name, function, period, critical)
+
+        def gated() -> None:
+            if (self.loop_count - task.phase) % task.divisor == 0 and (task.critical or not self.shedding):
+                function()
+
+        return gated
+
+    def set_shedding(self, shedding: bool) -> None:
+        self.shedding = shedding
+
+    def tick(self) -> None:
+        self.loop_count += 1
+
+    def run(self) -> None:
+        for task in self.callbacks:
+            if (self.loop_count - task.phase) % task.divisor == 0 and (task.critical or not self.shedding):
+                task.callback()
+
+    def _create_task(self, name: str, callback: Callable[[], None], period: float, critical: bool) -> RateTask:
+        divisor = max(1, round(period / self.base_period))
+        task = RateTask(name, callback, divisor, self._pick_phase(divisor), critical)
+        self.tasks.append(task)
+        return task
+
+    def _pick_phase(self, divisor: int) -> int:
+        """Two tasks ever share a loop when their phases are equal modulo the gcd of their divisors. Choose the
+        phase that shares loops with the fewest existing tasks."""
+        best_phase = 0
+        best_collisions = len(self.tasks) + 1
+        for phase in range(divisor):
+            collisions = 0
+            for task in self.tasks:
+                if (phase - task.phase) % gcd(divisor, task.divisor) == 0:
+                    collisions += 1
+            if collisions < best_collisions:
+                best_phase = phase
+                best_collisions = collisions
+        return best_phase
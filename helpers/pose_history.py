@@ -0,0 +1,133 @@
+from array import array
+from math import atan2, cos, sin
+from threading import Lock
+
+from wpimath.geometry import Pose2d, Rotation2d
+
+
+class PoseHistory:
+    """
+    Fixed-size ring buffer of timestamped odometry samples (pose, raw gyro heading and field-relative speeds),
+    written from the odometry thread and read from the main loop. Storage is preallocated arrays, so adding a sample allocates
+    nothing. Lookups binary search the timestamps and interpolate between the two neighbouring samples.
+    """
+
+    def __init__(self, size: int):
+        self.size = size
+        self._time = array("d", bytes(8 * size))
+        self._x = array("d", bytes(8 * size))
+        self._y = array("d", bytes(8 * size))
+        self._heading = array("d", bytes(8 * size))
+        self._raw_heading = array("d", bytes(8 * size))
+        self._vx = array("d", bytes(8 * size))
+        self._vy = array("d", bytes(8 * size))
+        self._omega = array("d", bytes(8 * size))
+        self._next = 0
+        self._count = 0
+        self._lock = Lock()
+
+    def add(self, timestamp: float, pose: Pose2d, raw_heading: float, vx: float, vy: float, omega: float) -> None:
+        """Store a sample. Samples must arrive in time order; a repeat of the newest timestamp is dropped, and an
+        older one clears the buffer (odometry was reset or the clock jumped)."""
+        self.add_values(timestamp, pose.x, pose.y, pose.rotation().radians(), raw_heading, vx, vy, omega)
+
+    def add_values(self, timestamp: float, x: float, y: float, heading: float, raw_heading: float, vx: float,
+                   vy: float, omega: float) -> None:
+        """add() with the pose already split into x, y and heading (radians)."""
+        with self._lock:
+            if self._count:
+                newest = self._time[(self._next - 1) % self.size]
+                if timestamp == newest:
+                    return
+                if timestamp < newest:
+                    self._count = 0
+            i = self._next
+            self._time[i] = timestamp
+            self._x[i] = x
+            self._y[i] = y
+            self._heading[i] = heading
+            self._raw_heading[i] = raw_heading
+            self._vx[i] = vx
+            self._vy[i] = vy
+            self._omega[i] = omega
+            self._next = (i + 1) % self.size
+            if self._count < self.size:
+                self._count += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._count = 0
+
+    def oldest_time(self) -> float:
+        """Returns the timestamp of the oldest stored sample, or -1 when empty."""
+        with self._lock:
+            if self._count == 0:
+                return -1.0
+            return self._time[(self._next - self._count) % self.size]
+
+    def sample(self, timestamp: float) -> Pose2d | None:
+        """Returns the interpolated pose at a timestamp, clamped to the stored range. None when empty."""
+        with self._lock:
+            found = self._find(timestamp)
+            if found is None:
+                return None
+            a, b, t = found
+            heading_a = self._heading[a]
+            turn = self._heading[b] - heading_a
+            turn = atan2(sin(turn), cos(turn))
+            return Pose2d(self._x[a] + (self._x[b] - self._x[a]) * t,
+                          self._y[a] + (self._y[b] - self._y[a]) * t,
+                          Rotation2d(heading_a + turn * t))
+
+    def sample_raw_heading(self, timestamp: float) -> float | None:
+        """Returns the interpolated raw gyro heading (radians) at a timestamp. Unlike the pose heading it is never
+        corrected by vision, so the difference between two samples is only how far the robot turned. None when
+        empty."""
+        with self._lock:
+            found = self._find(timestamp)
+            if found is None:
+                return None
+            a, b, t = found
+            heading_a = self._raw_heading[a]
+            turn = self._raw_heading[b] - heading_a
+            return heading_a + atan2(sin(turn), cos(turn)) * t
+
+    def sample_velocity(self, timestamp: float) -> tuple[float, float, float] | None:
+        """Returns the interpolated field-relative (vx, vy, omega) at a timestamp. None when empty."""
+        with self._lock:
+            found = self._find(timestamp)
+            if found is None:
+                return None
+            a, b, t = found
+            return (self._vx[a] + (self._vx[b] - self._vx[a]) * t,
+                    self._vy[a] + (self._vy[b] - self._vy[a]) * t,
+                    self._omega[a] + (self._omega[b] - self._omega[a]) * t)
+
+    def _find(self, timestamp: float) -> tuple[int, int, float] | None:
+        """Returns the physical indices of the samples either side of the timestamp and the interpolation
+        fraction between them. Must be called with the lock held."""
+        count = self._count
+        if count == 0:
+            return None
+        size = self.size
+        times = self._time
+        first = (self._next - count) % size
+
+        # Binary search for the first logical sample at or after the timestamp.
+        low = 0
+        high = count
+        while low < high:
+            middle = (low + high) // 2
+            if times[(first + middle) % size] < timestamp:
+                low = middle + 1
+            else:
+                high = middle
+
+        if low == 0:
+            return first, first, 0.0
+        if low == count:
+            newest = (first + count - 1) % size
+            return newest, newest, 0.0
+        before = (first + low - 1) % size
+        after = (first + low) % size
+        return before, after, (timestamp - times[before]) / (times[after] - times[before])
@@ -0,0 +1,101 @@
+from math import cos, radians, sin
+
+
+class ScoringBranch:
+    """One scoring location on a reef face."""
+
+    def __init__(self, name: str, x: float, y: float, heading: float):
+        self.name = name
+        self.x = x
+        self.y = y
+        self.heading = heading
+
+
+class ScoringFace:
+    """
+    One reef face: its center, the heading (degrees) of its approach line, the tag used for servoing and its
+    branches. The table's headings point either into or out of the reef, so direction is the line's unit vector
+    turned to point into the reef (the way the robot drives in), and normal points to its left. Distances to the
+    line are then a dot product each, with no slopes and nothing special about vertical lines.
+    """
+
+    def __init__(self, alliance: str, index: int, x: float, y: float, heading: float, tag_id: int,
+                 branches: list[ScoringBranch], reef_x: float, reef_y: float):
+        self.alliance = alliance
+        self.index = index
+        self.x = x
+        self.y = y
+        self.heading = heading
+        self.tag_id = tag_id
+        self.branches = branches
+        direction = (cos(radians(heading)), sin(radians(heading)))
+        if direction[0] * (reef_x - x) + direction[1] * (reef_y - y) < 0:
+            direction = (-direction[0], -direction[1])
+        self.direction = direction
+        self.normal = (-direction[1], direction[0])
+
+    def signed_distance(self, x: float, y: float) -> float:
+        """Distance from a point to the approach line, positive to the left when facing the reef."""
+        return (x - self.x) * self.normal[0] + (y - self.y) * self.normal[1]
+
+    def along_track(self, x: float, y: float) -> float:
+        """Distance left to drive along the approach line to the face center, negative once past it."""
+        return (self.x - x) * self.direction[0] + (self.y - y) * self.direction[1]
+
+
+class ScoringGeometry:
+    """
+    Every reef face and branch for both alliances, built once from the red side's table. The blue side is the
+    red side rotated about the field center. Faces and branches are also kept as flat (x, y, item) tuples per
+    alliance, so a nearest lookup is one pass over squared distances with no allocation.
+
+    The red table uses UtilSubsystem's format: one entry per face of
+    [x, y, [[x, y, heading, name], ...branches], tag ID].
+    """
+
+    def __init__(self, red_sides: list, blue_tags: list[int], field_length: float, field_width: float):
+        self.faces: dict[str, list[ScoringFace]] = {"red": [], "blue": []}
+        reef_x = sum(side[0] for side in red_sides) / len(red_sides)
+        reef_y = sum(side[1] for side in red_sides) / len(red_sides)
+        for index, (x, y, branches, tag_id) in enumerate(red_sides):
+            self.faces["red"].append(ScoringFace(
+                "red", index, x, y, branches[0][2], tag_id,
+                [ScoringBranch(name, bx, by, heading) for bx, by, heading, name in branches], reef_x, reef_y))
+            self.faces["blue"].append(ScoringFace(
+                "blue", index, field_length - x, field_width - y, (branches[0][2] + 180) % 360, blue_tags[index],
+                [ScoringBranch(name.replace("Red", "Blue"), field_length - bx, field_width - by,
+                               (heading + 180) % 360) for bx, by, heading, name in branches],
+                field_length - reef_x, field_width - reef_y))
+
+        self._face_points = {alliance: tuple((face.x, face.y, face) for face in faces)
+                             for alliance, faces in self.faces.items()}
+        self._branch_points = {alliance: tuple((branch.x, branch.y, branch) for face in faces
+                                               for branch in face.branches)
+                               for alliance, faces in self.faces.items()}
+        self.tags = {face.tag_id: face for faces in self.faces.values() for face in faces}
+
+    def nearest_face(self, alliance: str, x: float, y: float) -> ScoringFace:
+        return _nearest(self._face_points[alliance], x, y)
+
+    def nearest_branch(self, alliance: str, x: float, y: float) -> ScoringBranch:
+        return _nearest(self._branch_points[alliance], x, y)
+
+    def signed_distances(self, alliance: str, x: float, y: float) -> list[float]:
+        """Signed distance from a point to every face's approach line, in face order."""
+        return [face.signed_distance(x, y) for face in self.faces[alliance]]
+
+    def face_for_tag(self, tag_id: int) -> ScoringFace | None:
+        return self.tags.get(tag_id)
+
+
+def _nearest(points: tuple, x: float, y: float):
+    best = None
+    best_distance = float("inf")
+    for px, py, item in points:
+        dx = px - x
+        dy = py - y
+        distance = dx * dx + dy * dy
+        if distance < best_distance:
+            best_distance = distance
+            best = item
+    return best
@@ -0,0 +1,78 @@
+from bisect import bisect_left
+from math import atan2, degrees, hypot
+
+
+class ShotSolution:
+    """Result of one solve. heading is in degrees, field-relative."""
+
+    def __init__(self, heading: float, valid: bool, time_of_flight: float, distance: float, iterations: int):
+        self.heading = heading
+        self.valid = valid
+        self.time_of_flight = time_of_flight
+        self.distance = distance
+        self.iterations = iterations
+
+
+class ShotSolver:
+    """
+    Aims a shot taken while moving. The robot's position and velocity are first projected forward over the
+    release delay using the estimated acceleration. The piece keeps the robot's velocity after release, so
+    the robot aims at a virtual goal offset by -velocity * time_of_flight. Time of flight depends on the distance
+    to that virtual goal, so the two are iterated to agreement. The iteration count is capped so every call has a
+    fixed worst-case cost; a shot is only valid if it converged inside the cap and is within the distance and
+    speed limits.
+    """
+
+    def __init__(self, time_of_flight_table: list[tuple[float, float]], release_delay: float, max_iterations: int,
+                 tolerance: float, min_distance: float, max_distance: float, max_speed: float):
+        self.distances = [point[0] for point in time_of_flight_table]
+        self.times = [point[1] for point in time_of_flight_table]
+        self.release_delay = release_delay
+        self.max_iterations = max_iterations
+        self.tolerance = tolerance
+        self.min_distance = min_distance
+        self.max_distance = max_distance
+        self.max_speed = max_speed
+
+    def time_of_flight(self, distance: float) -> float:
+        """Time of flight at a distance, linearly interpolated from the table and held at its ends."""
+        distances = self.distances
+        i = bisect_left(distances, distance)
+        if i == 0:
+            return self.times[0]
+        if i == len(distances):
+            return self.times[-1]
+        fraction = (distance - distances[i - 1]) / (distances[i] - distances[i - 1])
+        return self.times[i - 1] + (self.times[i] - self.times[i - 1]) * fraction
+
+    def solve(self, goal: [float, float], x: float, y: float, vx: float, vy: float, ax: float,
+              ay: float) -> ShotSolution:
+        """Solve for the heading that scores from a robot at (x, y) moving at (vx, vy) and accelerating at
+        (ax, ay), all field-relative."""
+        delay = self.release_delay
+        release_x = x + vx * delay + 0.5 * ax * delay * delay
+        release_y = y + vy * delay + 0.5 * ay * delay * delay
+        release_vx = vx + ax * delay
+        release_vy = vy + ay * delay
+
+        dx = goal[0] - release_x
+        dy = goal[1] - release_y
+        distance = hypot(dx, dy)
+        flight = self.time_of_flight(distance)
+        converged = False
+        iterations = 0
+        while iterations < self.max_iterations:
+            iterations += 1
+            dx = goal[0] - release_vx * flight - release_x
+            dy = goal[1] - release_vy * flight - release_y
+            distance = hypot(dx, dy)
+            next_flight = self.time_of_flight(distance)
+            if abs(next_flight - flight) < self.tolerance:
+                flight = next_flight
+                converged = True
+                break
+            flight = next_flight
+
+        valid = (converged and self.min_distance <= distance <= self.max_distance
+                 and hypot(release_vx, release_vy) <= self.max_speed)
+        return ShotSolution(degrees(atan2(dy, dx)), valid, flight, distance, iterations)
@@ -0,0 +1,74 @@
+from math import atan2, cos, sin
+from time import perf_counter
+from typing import Callable
+
+from photonlibpy.photonCamera import PhotonCamera
+from photonlibpy.simulation import PhotonCameraSim, SimCameraProperties, VisionSystemSim
+from robotpy_apriltag import AprilTagFieldLayout
+from wpilib import Notifier
+from wpimath.geometry import Pose2d, Rotation2d, Transform3d
+
+
+class SimVision:
+    """
+    Simulated cameras for PhotonVision. Rendering the tags is expensive, so it runs on its own Notifier at the
+    simulated camera frame rate instead of in the robot loop, and a frame is skipped when the robot has not
+    moved since the last one. A frame is still rendered at least every max_skip_time so a stationary robot keeps
+    producing fresh results.
+    """
+
+    def __init__(self, cameras: list[tuple[PhotonCamera, Transform3d]], field_layout: AprilTagFieldLayout, fps: float,
+                 resolution: tuple[int, int], fov: float, max_skip_time: float, min_translation: float = 0.002,
+                 min_rotation: float = 0.002):
+        self.vision_sim = VisionSystemSim("main")
+        self.vision_sim.addAprilTags(field_layout)
+        camera_prop = SimCameraProperties()
+        camera_prop.setCalibrationFromFOV(resolution[0], resolution[1], Rotation2d.fromDegrees(fov))
+        camera_prop.setCalibError(0.01, 0.01)
+        camera_prop.setFPS(fps)
+        camera_prop.setAvgLatency(0.01)
+        camera_prop.setLatencyStdDev(0.01)
+        for camera, robot_to_camera in cameras:
+            self.vision_sim.addCamera(PhotonCameraSim(camera, camera_prop), robot_to_camera)
+
+        self.period = 1 / fps
+        self.max_skip_time = max_skip_time
+        self.min_translation = min_translation
+        self.min_rotation = min_rotation
+        self.updates = 0
+        self.skipped = 0
+        self.update_time = 0.0
+        self.total_update_time = 0.0
+        self._last_pose: Pose2d | None = None
+        self._last_update = 0.0
+        self._notifier: Notifier | None = None
+
+    def start(self, pose_supplier: Callable[[], Pose2d]) -> None:
+        """Render frames from the given pose on a background thread at the camera frame rate."""
+        self._notifier = Notifier(lambda: self.step(pose_supplier(), perf_counter()))
+        self._notifier.setName("Vision Sim")
+        self._notifier.startPeriodic(self.period)
+
+    def stop(self) -> None:
+        if self._notifier is not None:
+            self._notifier.stop()
+            self._notifier = None
+
+    def step(self, pose: Pose2d, now: float) -> bool:
+        """Render one frame unless the robot hasn't moved. Returns True if a frame was rendered."""
+        last = self._last_pose
+        if last is not None and now - self._last_update < self.max_skip_time:
+            turn = pose.rotation().radians() - last.rotation().radians()
+            if (abs(pose.x - last.x) < self.min_translation and abs(pose.y - last.y) < self.min_translation and
+                    abs(atan2(sin(turn), cos(turn))) < self.min_rotation):
+                self.skipped += 1
+                return False
+
+        start = perf_counter()
+        self.vision_sim.update(pose)
+        self.update_time = perf_counter() - start
+        self.total_update_time += self.update_time
+        self._last_pose = pose
+        self._last_update = now
+        self.updates += 1
+        return True
@@ -0,0 +1,102 @@
+"""
+Measures what simulated vision costs the 20 ms sim loop. The real drivetrain runs headless in simulation and is
+moved along a fixed route around the reef (with a stop at each face). Every loop is what Robot.robotPeriodic
+does (snapshot refresh and CommandScheduler.run(), which drains and processes the camera frames), run in real
+time, with simulated vision:
+
+    off           no tags rendered
+    every loop    VisionSystemSim.update() inside every loop, as the sim used to
+    rate limited  SimVision on its own thread at the camera frame rate, skipping frames while the robot is stopped
+
+The rate-limited rendering happens between loops, so its loop time only shows what the thread costs the loop
+through the GIL; its own rendering time is reported separately. Each scenario runs for --seconds of real time.
+Run from the project root:
+
+    python -m helpers.sim_vision_benchmark --seconds 30
+"""
+import argparse
+from math import cos, pi, sin
+from time import perf_counter, sleep
+
+import hal
+from commands2 import CommandScheduler
+from phoenix6 import unmanaged
+from wpimath.geometry import Pose2d, Rotation2d
+
+from constants import LoopConstants, VisionConstants
+from generated.tuner_constants import TunerConstants
+from helpers.field_context import field
+from subsystems.command_swerve_drivetrain import CommandSwerveDrivetrain
+
+
+def route(loops: int) -> list[Pose2d]:
+    """A lap around the blue reef facing its centre, stopping for a second at each of the six faces."""
+    center_x, center_y, radius = 4.49, 4.03, 1.6
+    stop = int(1 / LoopConstants.period)
+    moving = max(1, loops // 6 - stop)
+    poses = []
+    for face in range(6):
+        for i in range(moving + stop):
+            angle = (face + min(i, moving) / moving) * pi / 3
+            poses.append(Pose2d(center_x + radius * cos(angle), center_y + radius * sin(angle),
+                                Rotation2d(angle + pi)))
+    return poses[:loops]
+
+
+def loop_once(drivetrain: CommandSwerveDrivetrain) -> None:
+    """What Robot.robotPeriodic does each loop, minus the dashboard work."""
+    unmanaged.feed_enable(0.1)
+    field.refresh()
+    drivetrain.refresh_snapshot()
+    CommandScheduler.getInstance().run()
+
+
+def time_loops(drivetrain: CommandSwerveDrivetrain, poses: list[Pose2d], step) -> list[float]:
+    """Times one robot loop, plus step(pose), per pose on the route at the robot loop rate."""
+    durations = []
+    next_loop = perf_counter()
+    for pose in poses:
+        drivetrain.reset_pose(pose)
+        start = perf_counter()
+        loop_once(drivetrain)
+        step(pose)
+        durations.append(perf_counter() - start)
+        next_loop += LoopConstants.period
+        sleep(max(0.0, next_loop - perf_counter()))
+    return durations
+
+
+def summary(name: str, durations: list[float]) -> str:
+    ordered = sorted(durations)
+    mean = sum(ordered) / len(ordered)
+    return (f"{name:>13}: mean {mean * 1000:.3f} ms, p99 {ordered[int(0.99 * (len(ordered) - 1))] * 1000:.3f} ms, "
+            f"max {ordered[-1] * 1000:.3f} ms per loop")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark simulated vision cost per robot loop.")
+    parser.add_argument("--seconds", type=float, default=30, help="real time per scenario")
+    arguments = parser.parse_args()
+
+    loops = int(arguments.seconds / LoopConstants.period)
+    poses = route(loops)
+    hal.initialize()
+    drivetrain = TunerConstants.create_drivetrain()
+    sim_vision = drivetrain.sim_vision
+
+    print(f"{loops} loops, {len(VisionConstants.cameras)} camera(s) at {VisionConstants.sim_fps} FPS")
+    sim_vision.stop()
+    print(summary("off", time_loops(drivetrain, poses, lambda pose: None)))
+    print(summary("every loop", time_loops(drivetrain, poses, sim_vision.vision_sim.update)))
+
+    updates, skipped, render_time = sim_vision.updates, sim_vision.skipped, sim_vision.total_update_time
+    sim_vision.start(lambda: drivetrain.get_state().pose)
+    print(summary("rate limited", time_loops(drivetrain, poses, lambda pose: None)))
+    sim_vision.stop()
+    render_time = sim_vision.total_update_time - render_time
+    print(f"rate limited rendered {sim_vision.updates - updates} frames and skipped {sim_vision.skipped - skipped}, "
+          f"{render_time * 1000 / loops:.3f} ms of rendering per loop on its own thread")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+from math import cos, sin
+
+from robotpy_apriltag import AprilTagFieldLayout
+from wpimath.geometry import Pose2d, Pose3d
+
+
+def mask_of(tag_ids) -> int:
+    """Returns the bitmask with a bit set for every tag ID."""
+    mask = 0
+    for tag_id in tag_ids:
+        mask |= 1 << tag_id
+    return mask
+
+
+def in_mask(mask: int, tag_id: int) -> bool:
+    """Constant-time membership test for a tag filter mask. Negative IDs (no tag) are never members."""
+    return tag_id >= 0 and (mask >> tag_id) & 1 == 1
+
+
+class TagInfo:
+    """Everything known about one tag, worked out once when the index is built."""
+
+    def __init__(self, tag_id: int, pose: Pose3d, alliance: str | None, face: int | None):
+        self.id = tag_id
+        self.pose = pose
+        self.pose2d: Pose2d = pose.toPose2d()
+        self.alliance = alliance
+        self.face = face
+        heading = self.pose2d.rotation().radians()
+        # Field-relative unit vector pointing out of the tag's face.
+        self.normal = (cos(heading), sin(heading))
+
+
+class TagIndex:
+    """
+    Lookup table for the field's AprilTags, built once from the field layout. Each tag carries its pose, normal,
+    alliance and reef face (its position in that alliance's reef tag list). Named tag filters are precomputed
+    as bitmasks so checking a target against the active filter is a shift and an AND.
+    """
+
+    def __init__(self, layout: AprilTagFieldLayout, red_reef: list[int], blue_reef: list[int]):
+        self.tags: dict[int, TagInfo] = {}
+        for tag in layout.getTags():
+            if tag.ID in red_reef:
+                alliance, face = "red", red_reef.index(tag.ID)
+            elif tag.ID in blue_reef:
+                alliance, face = "blue", blue_reef.index(tag.ID)
+            else:
+                alliance, face = None, None
+            self.tags[tag.ID] = TagInfo(tag.ID, tag.pose, alliance, face)
+
+        self.filters = {
+            "red_reef": mask_of(red_reef),
+            "blue_reef": mask_of(blue_reef),
+            "all": mask_of(red_reef + blue_reef),
+        }
+
+    def get(self, tag_id: int) -> TagInfo | None:
+        return self.tags.get(tag_id)
+
+    def filter(self, name: str) -> int:
+        """Returns the mask for a named filter, falling back to every reef tag."""
+        return self.filters.get(name, self.filters["all"])
+
+    @staticmethod
+    def ids_in(mask: int) -> list[int]:
+        """Returns the tag IDs set in a mask, for display."""
+        ids = []
+        tag_id = 0
+        while mask:
+            if mask & 1:
+                ids.append(tag_id)
+            mask >>= 1
+            tag_id += 1
+        return ids
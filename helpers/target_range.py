@@ -0,0 +1,70 @@
+from math import atan2, cos, hypot, radians, sin, tan
+
+from photonlibpy.targeting import PhotonTrackedTarget
+from wpimath.geometry import Transform3d
+
+from helpers.tag_index import TagIndex
+
+
+class TargetRange:
+    """Where a tag sits relative to the robot center on the floor plane (x forward, y left, meters), with the
+    range and bearing (radians, counter-clockwise positive) to it."""
+
+    def __init__(self, tag_id: int, x: float, y: float, timestamp: float = 0.0):
+        self.id = tag_id
+        self.x = x
+        self.y = y
+        self.timestamp = timestamp
+        self.range = hypot(x, y)
+        self.bearing = atan2(y, x)
+
+
+class TargetRangeEstimator:
+    """
+    Closed-form range and bearing to a tag from its 2D yaw and pitch. The target's pixel ray is rotated into the
+    robot frame with the camera's mount rotation and scaled until it reaches the tag's height from the field
+    layout, so no PnP solve is needed. Rays that run almost parallel to the floor (the tag near camera height)
+    give no usable range and return None rather than a huge number.
+    """
+
+    def __init__(self, tag_index: TagIndex, robot_to_cameras: list[Transform3d], min_vertical: float = 0.02):
+        self.heights = {tag_id: tag.pose.z for tag_id, tag in tag_index.tags.items()}
+        self.min_vertical = min_vertical
+        self.cameras = []
+        for transform in robot_to_cameras:
+            rotation = transform.rotation()
+            cr, sr = cos(rotation.x), sin(rotation.x)
+            cp, sp = cos(rotation.y), sin(rotation.y)
+            cy, sy = cos(rotation.z), sin(rotation.z)
+            # Rz(yaw) * Ry(pitch) * Rx(roll), the same extrinsic order as Rotation3d.
+            matrix = ((cy * cp, cy * sp * sr - sy * cr, cy * sp * cr + sy * sr),
+                      (sy * cp, sy * sp * sr + cy * cr, sy * sp * cr - cy * sr),
+                      (-sp, cp * sr, cp * cr))
+            self.cameras.append((transform.x, transform.y, transform.z, matrix))
+
+    def estimate(self, camera_index: int, target: PhotonTrackedTarget, timestamp: float = 0.0) -> TargetRange | None:
+        height = self.heights.get(target.fiducialId)
+        if height is None:
+            return None
+        x, y, z, matrix = self.cameras[camera_index]
+        # Camera-frame ray through the target center. PhotonVision yaw is positive right, pitch positive up.
+        ray = (1.0, -tan(radians(target.yaw)), tan(radians(target.pitch)))
+        rx = matrix[0][0] * ray[0] + matrix[0][1] * ray[1] + matrix[0][2] * ray[2]
+        ry = matrix[1][0] * ray[0] + matrix[1][1] * ray[1] + matrix[1][2] * ray[2]
+        rz = matrix[2][0] * ray[0] + matrix[2][1] * ray[1] + matrix[2][2] * ray[2]
+        if abs(rz) < self.min_vertical:
+            return None
+        scale = (height - z) / rz
+        if scale <= 0:
+            return None
+        return TargetRange(target.fiducialId, x + scale * rx, y + scale * ry, timestamp)
+
+    def estimate_all(self, camera_index: int, targets: list[PhotonTrackedTarget],
+                     timestamp: float = 0.0) -> dict[int, TargetRange]:
+        """Estimates every visible tag in a frame, keyed by tag ID, stamped with the frame's capture time."""
+        ranges = {}
+        for target in targets:
+            estimate = self.estimate(camera_index, target, timestamp)
+            if estimate is not None:
+                ranges[target.fiducialId] = estimate
+        return ranges
@@ -0,0 +1,36 @@
+from math import atan2, cos, degrees, sin
+
+
+class TargetTracker:
+    """
+    Latest 2D target yaw with the time it was captured and the raw gyro heading at that moment. Reading it back
+    adds the rotation the gyro has seen since capture, which removes camera latency from turn-to-target, and
+    returns None once the observation is older than the timeout. The gyro heading is used rather than the pose
+    heading because vision corrections to the pose are not robot rotation.
+
+    PhotonVision yaw is positive to the right, so turning the robot counter-clockwise (positive heading) moves
+    the target further right by the same angle.
+    """
+
+    def __init__(self, timeout: float):
+        self.timeout = timeout
+        self.yaw = 0.0
+        self.timestamp = -1.0
+        self.heading = 0.0
+
+    def update(self, yaw: float, timestamp: float, heading: float) -> None:
+        """Store a yaw in degrees, its capture timestamp and the raw gyro heading (radians) at capture."""
+        if timestamp >= self.timestamp:
+            self.yaw = yaw
+            self.timestamp = timestamp
+            self.heading = heading
+
+    def clear(self) -> None:
+        self.timestamp = -1.0
+
+    def get_yaw(self, now: float, heading: float) -> float | None:
+        """Returns the yaw (degrees) the target would have now, or None if there is no recent observation."""
+        if self.timestamp < 0 or now - self.timestamp > self.timeout:
+            return None
+        turn = heading - self.heading
+        return self.yaw + degrees(atan2(sin(turn), cos(turn)))
@@ -0,0 +1,83 @@
+from math import atan2, cos, sin
+
+from ntcore import NetworkTableInstance
+from wpilib import SmartDashboard
+from wpimath.geometry import Pose2d
+
+
+class VisionGate:
+    """
+    Rejects vision poses that disagree with where odometry says the robot was when the frame was captured.
+    The x/y residual is normalised by the combined measurement and odometry variance (a 2-DOF Mahalanobis
+    distance) and compared with a chi-square threshold. Multi-tag solves also have their heading residual
+    checked. If a camera keeps getting rejected with measurements that agree with each other, odometry is more
+    likely to be the one that is wrong (the robot was hit or slipped), so after enough agreeing rejections in a
+    row the next agreeing measurement is let through. A lone outlier breaks the run and starts it over.
+
+    Thresholds are published under "Vision Gate/" and can be tuned live from the dashboard. Rejections are
+    counted per camera (in CameraStats) and per tag, and the per-tag counts are published to NetworkTables.
+    """
+
+    tunables = ("chi_squared_threshold", "heading_threshold", "odometry_std_dev", "max_consecutive_rejects")
+
+    def __init__(self, chi_squared_threshold: float, heading_threshold: float, odometry_std_dev: float,
+                 max_consecutive_rejects: int, camera_count: int, table: str = "Vision Gate/"):
+        self.chi_squared_threshold = chi_squared_threshold
+        self.heading_threshold = heading_threshold
+        self.odometry_std_dev = odometry_std_dev
+        self.max_consecutive_rejects = max_consecutive_rejects
+        self.consecutive_rejects = [0] * camera_count
+        self._last_rejected: list[Pose2d | None] = [None] * camera_count
+        self.rejects_by_tag: dict[int, int] = {}
+        self._table = table
+        for name in self.tunables:
+            SmartDashboard.putNumber(table + name, getattr(self, name))
+        self._tag_rejects_pub = (NetworkTableInstance.getDefault().getTable("Vision")
+                                 .getIntegerArrayTopic("Gate Rejects By Tag").publish())
+
+    def refresh_tunables(self) -> None:
+        """Pull the current values back from the dashboard and publish the per-tag reject counts."""
+        for name in self.tunables:
+            setattr(self, name, SmartDashboard.getNumber(self._table + name, getattr(self, name)))
+        # Published as [tag, count, tag, count, ...].
+        flattened = []
+        for tag_id, count in self.rejects_by_tag.items():
+            flattened += [tag_id, count]
+        self._tag_rejects_pub.set(flattened)
+
+    def check(self, camera_index: int, measured: Pose2d, reference: Pose2d, stddevs: tuple[float, float, float],
+              tag_ids: list[int]) -> bool:
+        """Returns True if the measurement should be fused."""
+        distance = self._distance(measured, reference, stddevs, self.odometry_std_dev * self.odometry_std_dev)
+        passed = distance <= self.chi_squared_threshold
+        if passed and len(tag_ids) > 1:
+            turn = measured.rotation().radians() - reference.rotation().radians()
+            passed = abs(atan2(sin(turn), cos(turn))) <= self.heading_threshold
+
+        if not passed:
+            # Odometry is only overruled by a run of rejected measurements that agree with each other.
+            previous = self._last_rejected[camera_index]
+            if previous is None or self._distance(measured, previous, stddevs, 0.0) > self.chi_squared_threshold:
+                self.consecutive_rejects[camera_index] = 0
+            elif self.consecutive_rejects[camera_index] >= self.max_consecutive_rejects:
+                passed = True
+
+        if passed:
+            self.consecutive_rejects[camera_index] = 0
+            self._last_rejected[camera_index] = None
+            return True
+
+        self.consecutive_rejects[camera_index] += 1
+        self._last_rejected[camera_index] = measured
+        for tag_id in tag_ids:
+            self.rejects_by_tag[tag_id] = self.rejects_by_tag.get(tag_id, 0) + 1
+        return False
+
+    @staticmethod
+    def _distance(measured: Pose2d, reference: Pose2d, stddevs: tuple[float, float, float],
+                  reference_variance: float) -> float:
+        """Squared x/y residual normalised by the measurement variance plus the reference's variance."""
+        dx = measured.x - reference.x
+        dy = measured.y - reference.y
+        return (dx * dx / (stddevs[0] * stddevs[0] + reference_variance) +
+                dy * dy / (stddevs[1] * stddevs[1] + reference_variance))
@@ -0,0 +1,132 @@
+import struct
+from threading import Lock
+from time import strftime
+
+from photonlibpy.packet import Packet
+from photonlibpy.targeting import PhotonPipelineResult
+from wpilib import DataLogManager
+from wpimath.geometry import Pose2d
+
+from helpers.vision_worker import VisionFrame
+
+# File layout: the header, then records, each starting with a one byte type.
+#   C  camera:   index (uint8), name length (uint16), UTF-8 name
+#   O  odometry: timestamp, x, y, heading, raw gyro heading (radians), field vx, vy, omega (8 doubles)
+#   V  vision:   camera index (uint8), timestamp (double, odometry timebase), NT receive time (int64 microseconds,
+#                not part of the PhotonVision serialization), payload length (uint32), PhotonVision packed result
+#   M  tag mask: timestamp (double), tag filter bitmask (int64), written whenever the filter changes
+#   R  reset:    timestamp (double), std-devs (3 doubles), written when a pose reset from vision is asked for
+HEADER = b"VLOG\x02"
+_CAMERA = struct.Struct("<cBH")
+_ODOMETRY = struct.Struct("<c8d")
+_VISION = struct.Struct("<cBdqI")
+_TAG_MASK = struct.Struct("<cdq")
+_RESET = struct.Struct("<c4d")
+
+
+class VisionRecorder:
+    """
+    Writes every camera result and odometry sample, and every change to how frames are judged (the tag filter
+    and pose resets), to a compact binary log for offline replay (helpers.vision_replay). Results are stored with PhotonVision's own serialization. Odometry arrives on the
+    odometry thread and frames on the robot loop, so writes are serialised by a lock into a buffered file.
+    """
+
+    def __init__(self, path: str, camera_names: list[str]):
+        self.path = path
+        self._file = open(path, "wb", buffering=1 << 16)
+        self._lock = Lock()
+        self._file.write(HEADER)
+        for index, name in enumerate(camera_names):
+            encoded = name.encode()
+            self._file.write(_CAMERA.pack(b"C", index, len(encoded)) + encoded)
+
+    @classmethod
+    def in_log_directory(cls, camera_names: list[str]) -> "VisionRecorder":
+        """Opens a time-stamped log next to the robot's DataLog files."""
+        return cls(DataLogManager.getLogDir() + "/vision_" + strftime("%Y%m%d_%H%M%S") + ".vlog", camera_names)
+
+    def record_odometry(self, timestamp: float, pose: Pose2d, raw_heading: float, vx: float, vy: float,
+                        omega: float) -> None:
+        record = _ODOMETRY.pack(b"O", timestamp, pose.x, pose.y, pose.rotation().radians(), raw_heading, vx, vy,
+                                omega)
+        with self._lock:
+            self._file.write(record)
+
+    def record_frame(self, frame: VisionFrame) -> None:
+        payload = PhotonPipelineResult.photonStruct.pack(frame.result).getData()
+        record = _VISION.pack(b"V", frame.camera_index, frame.timestamp, frame.result.ntReceiveTimestampMicros,
+                              len(payload)) + payload
+        with self._lock:
+            self._file.write(record)
+
+    def record_tag_mask(self, timestamp: float, mask: int) -> None:
+        record = _TAG_MASK.pack(b"M", timestamp, mask)
+        with self._lock:
+            self._file.write(record)
+
+    def record_reset(self, timestamp: float, stddevs: tuple[float, float, float]) -> None:
+        record = _RESET.pack(b"R", timestamp, *stddevs)
+        with self._lock:
+            self._file.write(record)
+
+    def flush(self) -> None:
+        with self._lock:
+            self._file.flush()
+
+    def close(self) -> None:
+        with self._lock:
+            self._file.close()
+
+
+def read_log(path: str):
+    """
+    Yields the records of a vision log in order:
+    ("camera", index, name), ("odometry", timestamp, x, y, heading, raw heading, vx, vy, omega),
+    ("vision", camera index, timestamp, PhotonPipelineResult), ("tag_mask", timestamp, mask) and
+    ("reset", timestamp, (x, y, heading std-devs)).
+    """
+    with open(path, "rb") as log:
+        data = log.read()
+    if not data.startswith(HEADER):
+        raise ValueError(path + " is not a version 2 vision log")
+
+    offset = len(HEADER)
+    end = len(data)
+    while offset < end:
+        kind = data[offset:offset + 1]
+        if kind == b"O":
+            if offset + _ODOMETRY.size > end:
+                break
+            _, *values = _ODOMETRY.unpack_from(data, offset)
+            offset += _ODOMETRY.size
+            yield ("odometry", *values)
+        elif kind == b"V":
+            if offset + _VISION.size > end:
+                break
+            _, index, timestamp, receive_micros, length = _VISION.unpack_from(data, offset)
+            offset += _VISION.size
+            if offset + length > end:
+                break
+            result = PhotonPipelineResult.photonStruct.unpack(Packet(data[offset:offset + length]))
+            result.ntReceiveTimestampMicros = receive_micros
+            offset += length
+            yield "vision", index, timestamp, result
+        elif kind == b"M":
+            if offset + _TAG_MASK.size > end:
+                break
+            _, timestamp, mask = _TAG_MASK.unpack_from(data, offset)
+            offset += _TAG_MASK.size
+            yield "tag_mask", timestamp, mask
+        elif kind == b"R":
+            if offset + _RESET.size > end:
+                break
+            _, timestamp, *stddevs = _RESET.unpack_from(data, offset)
+            offset += _RESET.size
+            yield "reset", timestamp, tuple(stddevs)
+        elif kind == b"C":
+            _, index, length = _CAMERA.unpack_from(data, offset)
+            offset += _CAMERA.size
+            yield "camera", index, data[offset:offset + length].decode()
+            offset += length
+        else:
+            raise ValueError(f"Corrupt vision log {path} at byte {offset}")
@@ -0,0 +1,172 @@
+"""
+Runs the camera side of vision (reading PhotonVision results, pose estimation and tag screening) in its own
+Python process, so it never holds the robot process's GIL. Screened frames come back through a shared-memory
+VisionRing that the drivetrain drains every loop; the std-dev model, the odometry gate and the 2D target logic
+stay in the robot process because they need odometry. In stand-in mode the process makes up frames at a fixed
+rate instead of reading cameras, to test the ring and the loop timing without any cameras.
+"""
+import atexit
+import multiprocessing
+import random
+from math import sin
+from time import perf_counter, sleep
+
+from ntcore import NetworkTableInstance
+from phoenix6 import utils
+from photonlibpy.photonPoseEstimator import PoseStrategy
+from wpilib import Timer
+from wpimath.geometry import Pose2d, Rotation2d
+
+from helpers.camera_registry import robot_to_camera
+from helpers.vision_processor import VisionCandidate, screen_pose
+from helpers.vision_ring import HAS_POSE, STAMP_ON_READ, RingTarget, VisionRing
+from helpers.vision_worker import CameraStats, VisionFrame
+
+
+def run_cameras(ring_name: str, capacity: int, configs: list[dict], strategy: PoseStrategy, period: float,
+                estimate_poses: bool) -> None:
+    """Vision process entry point. Connects to the robot's NetworkTables server as a client and polls every
+    camera. Capture times are moved onto the server's clock, which is the robot's FPGA clock."""
+    from photonlibpy.photonCamera import PhotonCamera
+    from photonlibpy.photonPoseEstimator import PhotonPoseEstimator
+    from robotpy_apriltag import AprilTagField, AprilTagFieldLayout
+
+    ring = VisionRing(capacity, ring_name)
+    nt = NetworkTableInstance.getDefault()
+    nt.startClient4("vision process")
+    nt.setServer("127.0.0.1")
+    layout = AprilTagFieldLayout.loadField(AprilTagField.k2025ReefscapeWelded)
+    cameras = [(index, PhotonCamera(config["name"]),
+                PhotonPoseEstimator(layout, strategy, None, robot_to_camera(config)))
+               for index, config in enumerate(configs)]
+
+    while True:
+        start = perf_counter()
+        offset = nt.getServerTimeOffset()
+        if offset is not None:
+            for index, camera, estimator in cameras:
+                for result in camera.getAllUnreadResults():
+                    frame_start = perf_counter()
+                    estimated_pose = estimator.update(result) if estimate_poses else None
+                    candidate = None
+                    if estimated_pose is not None:
+                        candidate = screen_pose(result, estimated_pose, ring.tag_mask)
+                    ring.write(index, HAS_POSE if estimated_pose is not None else 0,
+                               result.getTimestampSeconds() + offset / 1e6, perf_counter() - frame_start,
+                               candidate, result.getTargets())
+        sleep(max(0.0, period - (perf_counter() - start)))
+
+
+def run_stand_in(ring_name: str, capacity: int, camera_count: int, fps: float, load: float,
+                 pose: tuple[float, float, float]) -> None:
+    """Stand-in process entry point. Every camera reports a noisy pose near the given one, seen through the
+    lowest tag in the current filter, with a slowly swinging target. Each frame busy-waits for the given load in
+    seconds to stand in for the cost of real pose estimation."""
+    ring = VisionRing(capacity, ring_name)
+    period = 1 / fps
+    start_time = perf_counter()
+    while True:
+        start = perf_counter()
+        mask = ring.tag_mask
+        tag_id = (mask & -mask).bit_length() - 1
+        for index in range(camera_count):
+            frame_start = perf_counter()
+            while perf_counter() - frame_start < load:
+                pass
+            targets = []
+            candidate = None
+            if tag_id >= 0:
+                yaw = 10 * sin(perf_counter() - start_time)
+                targets.append(RingTarget(tag_id, yaw, 5.0, 1.0))
+                candidate = VisionCandidate(Pose2d(pose[0] + random.gauss(0, 0.02), pose[1] + random.gauss(0, 0.02),
+                                                   Rotation2d(pose[2] + random.gauss(0, 0.01))),
+                                            0.0, [tag_id], 2.0, 0.05, tag_id, yaw)
+            ring.write(index, HAS_POSE | STAMP_ON_READ, 0.0, perf_counter() - frame_start, candidate, targets)
+        sleep(max(0.0, period - (perf_counter() - start)))
+
+
+class ProcessCamera:
+    """A configured camera as seen from the robot process when vision runs in the vision process."""
+
+    def __init__(self, index: int, config: dict):
+        self.index = index
+        self.name = config["name"]
+        self.alignment = config["alignment"]
+        self.robot_to_camera = robot_to_camera(config)
+        self.camera = None
+        self.stats = CameraStats()
+
+
+class VisionProcessClient:
+    """
+    The robot-process side of the vision process, a drop-in for CameraRegistry. Owns the shared ring, starts the
+    process, and turns drained ring entries back into VisionFrames for the VisionProcessor.
+    """
+
+    def __init__(self, configs: list[dict], strategy: PoseStrategy, period: float, capacity: int,
+                 estimate_poses: bool, stand_in: bool = False, stand_in_fps: float = 30, stand_in_load: float = 0.0,
+                 stand_in_pose: tuple[float, float, float] = (0.0, 0.0, 0.0), ring_name: str = "robot_vision_ring",
+                 table: str = "Vision"):
+        self.cameras = [ProcessCamera(i, config) for i, config in enumerate(configs)]
+        self.ring = VisionRing(capacity, ring_name, create=True)
+        self._stopped = False
+        atexit.register(self.stop)
+        context = multiprocessing.get_context("spawn")
+        if stand_in:
+            self.process = context.Process(target=run_stand_in, name="Vision stand-in", daemon=True,
+                                           args=(self.ring.name, capacity, len(configs), stand_in_fps,
+                                                 stand_in_load, stand_in_pose))
+        else:
+            self.process = context.Process(target=run_cameras, name="Vision", daemon=True,
+                                           args=(self.ring.name, capacity, configs, strategy, period,
+                                                 estimate_poses))
+
+        nt_table = NetworkTableInstance.getDefault().getTable(table)
+        self._stats_publishers = [nt_table.getDoubleArrayTopic(camera.name).publish() for camera in self.cameras]
+        self._process_publisher = nt_table.getDoubleArrayTopic("Process").publish()
+        self._last_frames = [0] * len(self.cameras)
+        self._last_publish_time = Timer.getFPGATimestamp()
+
+    def start(self) -> None:
+        self.process.start()
+
+    def stop(self) -> None:
+        """Ends the vision process and frees the ring. Runs at exit; safe to call more than once."""
+        if self._stopped:
+            return
+        self._stopped = True
+        if self.process.is_alive():
+            self.process.terminate()
+            self.process.join(1)
+        self.ring.close()
+
+    def set_tag_mask(self, mask: int) -> None:
+        """Share the current tag filter with the vision process, which screens poses against it."""
+        self.ring.tag_mask = mask
+
+    def drain(self) -> list[VisionFrame]:
+        now = utils.get_current_time_seconds()
+        frames = []
+        for camera_index, flags, timestamp, processing_time, candidate, result in self.ring.read():
+            timestamp = now if flags & STAMP_ON_READ else utils.fpga_to_current_time(timestamp)
+            stats = self.cameras[camera_index].stats
+            stats.frames += 1
+            stats.latency = now - timestamp
+            stats.processing_time = processing_time
+            frames.append(VisionFrame(camera_index, result, None, timestamp, flags & HAS_POSE != 0, candidate))
+        return frames
+
+    def publish_stats(self) -> None:
+        """Same per-camera arrays as CameraRegistry.publish_stats, plus [process alive, frames dropped by the
+        ring]."""
+        now = Timer.getFPGATimestamp()
+        elapsed = now - self._last_publish_time
+        self._last_publish_time = now
+        for i, camera in enumerate(self.cameras):
+            stats = camera.stats
+            frames = stats.frames
+            fps = (frames - self._last_frames[i]) / elapsed if elapsed > 0 else 0.0
+            self._last_frames[i] = frames
+            self._stats_publishers[i].set([fps, stats.latency * 1000, stats.accepted, stats.rejected,
+                                           stats.processing_time * 1000, stats.dropped_frames, stats.gated])
+        self._process_publisher.set([1.0 if self.process.is_alive() else 0.0, self.ring.dropped])
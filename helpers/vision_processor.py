@@ -0,0 +1,198 @@
+from collections.abc import Iterable
+from math import hypot
+from typing import Callable
+
+from wpimath.geometry import Pose2d
+
+from helpers.pose_history import PoseHistory
+from helpers.tag_index import TagIndex, in_mask
+from helpers.target_range import TargetRange, TargetRangeEstimator
+from helpers.target_tracker import TargetTracker
+from helpers.vision_gate import VisionGate
+from helpers.vision_std_devs import VisionStdDevModel
+from helpers.vision_worker import CameraStats, VisionFrame
+
+
+class VisionCandidate:
+    """The parts of a pose estimate that fusion needs, pulled out of the PhotonVision objects."""
+
+    def __init__(self, pose: Pose2d, z: float, tag_ids: list[int], average_distance: float, ambiguity: float,
+                 best_id: int, best_yaw: float):
+        self.pose = pose
+        self.z = z
+        self.tag_ids = tag_ids
+        self.average_distance = average_distance
+        self.ambiguity = ambiguity
+        self.best_id = best_id
+        self.best_yaw = best_yaw
+
+
+def screen_pose(result, estimated_pose, mask: int) -> VisionCandidate | None:
+    """The odometry-free checks on a pose estimate: a used tag is in view and the pose is on the field. Runs on
+    the robot loop, or in the vision process when vision is offloaded."""
+    best_target = result.getBestTarget()
+    if best_target is not None:
+        if not in_mask(mask, best_target.fiducialId):
+            for k in result.getTargets():
+                if k is not None:
+                    if in_mask(mask, k.fiducialId):
+                        best_target = k
+    pose = estimated_pose.estimatedPose
+    if (best_target is None or not in_mask(mask, best_target.fiducialId) or
+            not (0 < pose.x < 17.658 and 0 < pose.y < 8.131)):
+        return None
+
+    targets_used = estimated_pose.targetsUsed
+    total_distance = 0.0
+    for target in targets_used:
+        total_distance += target.bestCameraToTarget.translation().norm()
+    tag_count = len(targets_used)
+    average_distance = total_distance / tag_count if tag_count else 0.0
+    ambiguity = targets_used[0].getPoseAmbiguity() if tag_count == 1 else 0.0
+    return VisionCandidate(pose.toPose2d(), pose.z, [target.fiducialId for target in targets_used],
+                           average_distance, ambiguity, best_target.fiducialId, best_target.getYaw())
+
+
+class VisionProcessor:
+    """
+    Every decision made about camera frames: which target is used for 2D alignment, and whether a pose estimate
+    is fused into odometry and with what std-devs. It has no hardware or NetworkTables inputs of its own, so the
+    drivetrain and the offline replay (helpers.vision_replay) run exactly the same code.
+    """
+
+    def __init__(self, tag_index: TagIndex, model: VisionStdDevModel, gate: VisionGate, pose_history: PoseHistory,
+                 stats: list[CameraStats], alignment: list[bool], range_estimator: TargetRangeEstimator,
+                 add_measurement: Callable[[Pose2d, float, tuple[float, float, float]], None], fuse_poses: bool,
+                 target_timeout: float):
+        self.tag_index = tag_index
+        self.model = model
+        self.gate = gate
+        self.pose_history = pose_history
+        self.stats = stats
+        self.alignment = alignment
+        self.range_estimator = range_estimator
+        self.add_measurement = add_measurement
+        self.fuse_poses = fuse_poses
+        self.target_timeout = target_timeout
+
+        # Bitmask of the tags vision currently trusts (see helpers.tag_index).
+        self.used_tag_mask = tag_index.filter("all")
+        self.alignment_frames: dict[int, VisionFrame] = {}
+        # Robot-relative range and bearing of every tag in the current alignment frames.
+        self.visible_targets: dict[int, TargetRange] = {}
+
+        self.tag_seen = False
+        self.target_yaw = -100000
+        self.target_range = -100000
+        self.target_id = -100000
+        self.target_in_view = False
+        self.target_tracker = TargetTracker(target_timeout)
+        # Std-devs for the next accepted pose in place of the model's, and when they were asked for (see
+        # reset_from_next_pose).
+        self.reset_stddevs: tuple[float, float, float] | None = None
+        self.reset_time = 0.0
+
+    def reset_from_next_pose(self, stddevs: tuple[float, float, float], now: float) -> None:
+        """Fuses the next pose that passes screening and the std-dev model with the given std-devs instead of the
+        model's, without gating it against odometry. Tiny std-devs make it a pose reset from vision. Only frames
+        captured from now until the target timeout count; after that the reset is dropped."""
+        self.reset_stddevs = stddevs
+        self.reset_time = now
+
+    def process(self, frames: Iterable[VisionFrame], now: float) -> bool:
+        """Applies frames oldest first, then refreshes the 2D target. Returns True if there were any frames."""
+        if self.reset_stddevs is not None and now - self.reset_time > self.target_timeout:
+            self.reset_stddevs = None
+        had_frames = False
+        accepted = False
+        for frame in frames:
+            had_frames = True
+            stats = self.stats[frame.camera_index]
+            if self.alignment[frame.camera_index]:
+                self.alignment_frames[frame.camera_index] = frame
+            if frame.has_pose:
+                if self.select_best_vision_pose(frame):
+                    stats.accepted += 1
+                    accepted = True
+                else:
+                    stats.rejected += 1
+
+        self.update_2d_solution(now)
+        if had_frames and self.fuse_poses:
+            self.tag_seen = accepted
+        return had_frames
+
+    def update_2d_solution(self, now: float) -> None:
+        """Fuses the newest frame of every alignment camera into one 2D target. A target in the used tags beats
+        one that is not, then the larger target wins. Frames older than the target timeout are ignored."""
+        oldest = now - self.target_timeout
+        best_target = None
+        best_frame = None
+        best_used = False
+        visible_targets = {}
+        for camera_index, frame in self.alignment_frames.items():
+            if frame.timestamp < oldest:
+                continue
+            visible_targets.update(self.range_estimator.estimate_all(camera_index, frame.result.getTargets(),
+                                                                     frame.timestamp))
+            target = frame.result.getBestTarget()
+            if target is None:
+                continue
+            used = in_mask(self.used_tag_mask, target.fiducialId)
+            if best_target is None or used > best_used or (used == best_used and target.area > best_target.area):
+                best_target = target
+                best_frame = frame
+                best_used = used
+        self.visible_targets = visible_targets
+
+        if best_target is not None:
+            self.target_in_view = True
+            self.target_id = best_target.fiducialId
+            if best_used:
+                self.target_yaw = best_target.yaw
+                best_range = visible_targets.get(best_target.fiducialId)
+                self.target_range = best_range.range if best_range is not None else -100000
+                if best_frame.timestamp > self.target_tracker.timestamp:
+                    capture_heading = self.pose_history.sample_raw_heading(best_frame.timestamp)
+                    if capture_heading is not None:
+                        self.target_tracker.update(best_target.yaw, best_frame.timestamp, capture_heading)
+        else:
+            self.target_in_view = False
+
+    def select_best_vision_pose(self, frame: VisionFrame) -> bool:
+        """Checks a frame's pose estimate and fuses it, with std-devs from the vision model, if it passes. Returns
+        True if it was fused."""
+        if frame.screened:
+            candidate = frame.candidate
+        else:
+            candidate = screen_pose(frame.result, frame.estimated_pose, self.used_tag_mask)
+        model = self.model
+        if candidate is None or abs(candidate.z) > model.max_z_error:
+            return False
+
+        velocity = self.pose_history.sample_velocity(frame.timestamp)
+        speed = hypot(velocity[0], velocity[1]) if velocity is not None else 0.0
+        stddevs = model.calculate(len(candidate.tag_ids), candidate.average_distance, candidate.ambiguity, speed)
+        if stddevs is None:
+            return False
+
+        measured_pose = candidate.pose
+        if self.reset_stddevs is not None and 0 <= frame.timestamp - self.reset_time <= self.target_timeout:
+            # A reset trusts vision over odometry, so it is not gated.
+            stddevs = self.reset_stddevs
+            self.reset_stddevs = None
+        else:
+            # sample() clamps to the oldest stored pose, which is no reference for a frame captured before it.
+            if frame.timestamp < self.pose_history.oldest_time():
+                self.stats[frame.camera_index].gated += 1
+                return False
+            reference_pose = self.pose_history.sample(frame.timestamp)
+            if reference_pose is not None and not self.gate.check(
+                    frame.camera_index, measured_pose, reference_pose, stddevs, candidate.tag_ids):
+                self.stats[frame.camera_index].gated += 1
+                return False
+
+        self.target_yaw = candidate.best_yaw
+        self.target_id = candidate.best_id
+        self.add_measurement(measured_pose, frame.timestamp, stddevs)
+        return True
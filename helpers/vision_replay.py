@@ -0,0 +1,121 @@
+"""
+Replays a vision log (see helpers.vision_log) through the same VisionProcessor the robot runs, as fast as the
+CPU allows. Needs no camera or robot. Use it to benchmark vision changes or sweep tunables over whole matches:
+
+    python -m helpers.vision_replay vision_20250301_101500.vlog --set xy_base=0.08 --set chi_squared_threshold=9
+"""
+import argparse
+from time import perf_counter
+
+from photonlibpy.photonPoseEstimator import PhotonPoseEstimator, PoseStrategy
+from robotpy_apriltag import AprilTagField, AprilTagFieldLayout
+
+from constants import EstimatorConstants, VisionConstants
+from helpers.camera_registry import robot_to_camera
+from helpers.pose_history import PoseHistory
+from helpers.tag_index import TagIndex
+from helpers.target_range import TargetRangeEstimator
+from helpers.vision_gate import VisionGate
+from helpers.vision_log import read_log
+from helpers.vision_processor import VisionProcessor
+from helpers.vision_std_devs import VisionStdDevModel
+from helpers.vision_worker import CameraStats, VisionFrame
+
+
+class ReplayResult:
+    """What a replay produced: every fused measurement as (pose, timestamp, stddevs), per-camera stats and timing."""
+
+    def __init__(self, camera_names: list[str], stats: list[CameraStats], measurements: list, frames: int,
+                 odometry_samples: int, elapsed: float):
+        self.camera_names = camera_names
+        self.stats = stats
+        self.measurements = measurements
+        self.frames = frames
+        self.odometry_samples = odometry_samples
+        self.elapsed = elapsed
+
+    def report(self) -> list[str]:
+        lines = [f"{self.frames} frames and {self.odometry_samples} odometry samples in {self.elapsed:.3f}s "
+                 f"({self.frames / self.elapsed if self.elapsed > 0 else 0:.0f} frames/s), "
+                 f"{len(self.measurements)} measurements fused"]
+        for name, stats in zip(self.camera_names, self.stats):
+            lines.append(f"{name}: {stats.accepted} accepted, {stats.rejected} rejected ({stats.gated} by the gate)")
+        return lines
+
+
+def replay(path: str, overrides: dict[str, float] | None = None, camera_configs: list[dict] | None = None,
+           strategy: PoseStrategy = PoseStrategy.MULTI_TAG_PNP_ON_COPROCESSOR) -> ReplayResult:
+    """Run a log through the vision processor. Overrides are applied by name to the std-dev model and the gate
+    (any of their tunables)."""
+    configs = camera_configs if camera_configs is not None else VisionConstants.cameras
+    layout = AprilTagFieldLayout.loadField(AprilTagField.k2025ReefscapeWelded)
+    tag_index = TagIndex(layout, VisionConstants.red_reef_tags, VisionConstants.blue_reef_tags)
+    model = VisionStdDevModel(VisionConstants.xy_std_dev_base, VisionConstants.theta_std_dev_base,
+                              VisionConstants.speed_std_dev_scale, VisionConstants.max_ambiguity,
+                              VisionConstants.max_tag_distance, VisionConstants.max_single_tag_distance,
+                              VisionConstants.max_vision_speed, VisionConstants.max_z_error)
+    gate = VisionGate(VisionConstants.gate_chi_squared, VisionConstants.gate_heading,
+                      VisionConstants.gate_odometry_std_dev, VisionConstants.gate_max_consecutive_rejects,
+                      len(configs))
+    for name, value in (overrides or {}).items():
+        if name in model.tunables:
+            setattr(model, name, value)
+        elif name in gate.tunables:
+            setattr(gate, name, value)
+        else:
+            raise ValueError("Unknown vision tunable " + name)
+
+    history = PoseHistory(EstimatorConstants.pose_history_size)
+    stats = [CameraStats() for _ in configs]
+    estimators = [PhotonPoseEstimator(layout, strategy, None, robot_to_camera(config)) for config in configs]
+    measurements = []
+    range_estimator = TargetRangeEstimator(tag_index, [robot_to_camera(config) for config in configs])
+    processor = VisionProcessor(tag_index, model, gate, history, stats, [config["alignment"] for config in configs],
+                                range_estimator,
+                                lambda pose, timestamp, stddevs: measurements.append((pose, timestamp, stddevs)),
+                                True, VisionConstants.target_timeout)
+
+    camera_names = [config["name"] for config in configs]
+    frames = 0
+    odometry_samples = 0
+    start = perf_counter()
+    for record in read_log(path):
+        if record[0] == "odometry":
+            _, timestamp, x, y, heading, raw_heading, vx, vy, omega = record
+            history.add_values(timestamp, x, y, heading, raw_heading, vx, vy, omega)
+            odometry_samples += 1
+        elif record[0] == "vision":
+            _, index, timestamp, result = record
+            frame = VisionFrame(index, result, estimators[index].update(result), timestamp)
+            stats[index].frames += 1
+            processor.process((frame,), timestamp)
+            frames += 1
+        elif record[0] == "tag_mask":
+            processor.used_tag_mask = record[2]
+        elif record[0] == "reset":
+            processor.reset_from_next_pose(record[2], record[1])
+        elif record[1] >= len(camera_names):
+            raise ValueError(f"Log camera {record[1]} is {record[2]}, the config has only {len(camera_names)} "
+                             f"cameras")
+        elif record[2] != camera_names[record[1]]:
+            raise ValueError(f"Log camera {record[1]} is {record[2]}, the config has {camera_names[record[1]]}")
+
+    return ReplayResult(camera_names, stats, measurements, frames, odometry_samples, perf_counter() - start)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Replay a vision log through the robot's vision processing.")
+    parser.add_argument("log")
+    parser.add_argument("--set", action="append", default=[], metavar="NAME=VALUE",
+                        help="override a vision model or gate tunable")
+    arguments = parser.parse_args()
+    overrides = {}
+    for setting in arguments.set:
+        name, value = setting.split("=", 1)
+        overrides[name] = float(value)
+    for line in replay(arguments.log, overrides).report():
+        print(line)
+
+
+if __name__ == "__main__":
+    main()
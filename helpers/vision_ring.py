@@ -0,0 +1,156 @@
+import struct
+from multiprocessing import shared_memory
+
+from wpimath.geometry import Pose2d, Rotation2d
+
+from helpers.tag_index import mask_of
+from helpers.vision_processor import VisionCandidate
+
+# Shared memory layout: the header, then a fixed number of slots.
+#   header: frames written (uint64), tag filter mask (int64, written by the robot process)
+#   slot:   sequence (uint64), frame, then MAX_TARGETS targets
+#   frame:  camera index, flags, timestamp, processing time, candidate x, y, heading, z, tag mask, average
+#           distance, ambiguity, best tag ID, best yaw, target count
+#   target: tag ID, yaw, pitch, area
+_HEADER = struct.Struct("<Qq")
+_SEQUENCE = struct.Struct("<Q")
+_FRAME = struct.Struct("<BBddddddqddhdB")
+_TARGET = struct.Struct("<hddd")
+MAX_TARGETS = 8
+_SLOT_SIZE = _SEQUENCE.size + _FRAME.size + MAX_TARGETS * _TARGET.size
+
+HAS_POSE = 1  # The camera produced a pose estimate.
+HAS_CANDIDATE = 2  # The estimate passed screening, the candidate fields are filled in.
+STAMP_ON_READ = 4  # No capture time (stand-in frames), the reader stamps the frame when it drains it.
+
+
+class RingTarget:
+    """The fields of a PhotonTrackedTarget that 2D alignment and range estimation read."""
+
+    def __init__(self, fiducial_id: int, yaw: float, pitch: float, area: float):
+        self.fiducialId = fiducial_id
+        self.yaw = yaw
+        self.pitch = pitch
+        self.area = area
+
+    def getYaw(self) -> float:
+        return self.yaw
+
+
+class RingResult:
+    """Stands in for a PhotonPipelineResult: the targets in PhotonVision's order, best first."""
+
+    def __init__(self, targets: list[RingTarget]):
+        self.targets = targets
+
+    def getTargets(self) -> list[RingTarget]:
+        return self.targets
+
+    def getBestTarget(self) -> RingTarget | None:
+        return self.targets[0] if self.targets else None
+
+
+class VisionRing:
+    """
+    Single-writer, single-reader ring of screened camera frames in shared memory, written by the vision process
+    and drained by the robot loop. The writer never waits: once the ring is full it overwrites the oldest slot,
+    and the reader counts the frames it missed. Each slot carries the number of the frame it holds, cleared
+    while the slot is written, so the reader can tell a finished slot from one that was overwritten mid-read.
+    """
+
+    def __init__(self, capacity: int, name: str, create: bool = False):
+        """Creates the named segment (the robot process) or attaches to it (the vision process). Creating first
+        unlinks any segment left under the same name by a robot process that did not exit cleanly."""
+        self.capacity = capacity
+        size = _HEADER.size + capacity * _SLOT_SIZE
+        if create:
+            try:
+                stale = shared_memory.SharedMemory(name=name)
+            except FileNotFoundError:
+                pass
+            else:
+                stale.close()
+                stale.unlink()
+            self.memory = shared_memory.SharedMemory(name=name, create=True, size=size)
+            _HEADER.pack_into(self.memory.buf, 0, 0, 0)
+        else:
+            self.memory = shared_memory.SharedMemory(name=name)
+        self.owner = create
+        self.name = name
+        self.read_count = 0
+        self.dropped = 0
+
+    @property
+    def tag_mask(self) -> int:
+        return _HEADER.unpack_from(self.memory.buf, 0)[1]
+
+    @tag_mask.setter
+    def tag_mask(self, mask: int) -> None:
+        struct.pack_into("<q", self.memory.buf, 8, mask)
+
+    def write(self, camera_index: int, flags: int, timestamp: float, processing_time: float,
+              candidate: VisionCandidate | None, targets) -> None:
+        """Append one frame. Targets are PhotonTrackedTargets, only the first MAX_TARGETS are kept."""
+        buffer = self.memory.buf
+        count = _HEADER.unpack_from(buffer, 0)[0]
+        offset = _HEADER.size + (count % self.capacity) * _SLOT_SIZE
+        _SEQUENCE.pack_into(buffer, offset, 0)
+
+        if candidate is not None:
+            flags |= HAS_CANDIDATE
+            pose = candidate.pose
+            _FRAME.pack_into(buffer, offset + _SEQUENCE.size, camera_index, flags, timestamp, processing_time,
+                             pose.x, pose.y, pose.rotation().radians(), candidate.z, mask_of(candidate.tag_ids),
+                             candidate.average_distance, candidate.ambiguity, candidate.best_id, candidate.best_yaw,
+                             min(len(targets), MAX_TARGETS))
+        else:
+            _FRAME.pack_into(buffer, offset + _SEQUENCE.size, camera_index, flags, timestamp, processing_time,
+                             0.0, 0.0, 0.0, 0.0, 0, 0.0, 0.0, -1, 0.0, min(len(targets), MAX_TARGETS))
+        target_offset = offset + _SEQUENCE.size + _FRAME.size
+        for target in targets[:MAX_TARGETS]:
+            _TARGET.pack_into(buffer, target_offset, target.fiducialId, target.yaw, target.pitch, target.area)
+            target_offset += _TARGET.size
+
+        _SEQUENCE.pack_into(buffer, offset, count + 1)
+        struct.pack_into("<Q", buffer, 0, count + 1)
+
+    def read(self) -> list[tuple]:
+        """Returns every frame written since the last read as (camera index, flags, timestamp, processing time,
+        VisionCandidate or None, RingResult), oldest first."""
+        buffer = self.memory.buf
+        written = _HEADER.unpack_from(buffer, 0)[0]
+        if written - self.read_count > self.capacity:
+            self.dropped += written - self.read_count - self.capacity
+            self.read_count = written - self.capacity
+
+        frames = []
+        while self.read_count < written:
+            count = self.read_count
+            self.read_count += 1
+            offset = _HEADER.size + (count % self.capacity) * _SLOT_SIZE
+            if _SEQUENCE.unpack_from(buffer, offset)[0] != count + 1:
+                self.dropped += 1
+                continue
+            (camera_index, flags, timestamp, processing_time, x, y, heading, z, tag_mask, average_distance,
+             ambiguity, best_id, best_yaw, target_count) = _FRAME.unpack_from(buffer, offset + _SEQUENCE.size)
+            target_offset = offset + _SEQUENCE.size + _FRAME.size
+            targets = []
+            for _ in range(target_count):
+                targets.append(RingTarget(*_TARGET.unpack_from(buffer, target_offset)))
+                target_offset += _TARGET.size
+            if _SEQUENCE.unpack_from(buffer, offset)[0] != count + 1:
+                self.dropped += 1
+                continue
+
+            candidate = None
+            if flags & HAS_CANDIDATE:
+                tag_ids = [tag_id for tag_id in range(64) if (tag_mask >> tag_id) & 1]
+                candidate = VisionCandidate(Pose2d(x, y, Rotation2d(heading)), z, tag_ids, average_distance,
+                                            ambiguity, best_id, best_yaw)
+            frames.append((camera_index, flags, timestamp, processing_time, candidate, RingResult(targets)))
+        return frames
+
+    def close(self) -> None:
+        self.memory.close()
+        if self.owner:
+            self.memory.unlink()
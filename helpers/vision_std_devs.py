@@ -0,0 +1,48 @@
+from wpilib import SmartDashboard
+
+
+class VisionStdDevModel:
+    """
+    Works out how much to trust a vision pose. The x/y std-dev grows with the square of the average tag
+    distance, shrinks with the number of tags and grows with robot speed (motion blur and timestamp error).
+    Heading is only trusted from multi-tag solves. Measurements outside the cutoffs are rejected outright.
+
+    Every parameter is published under "Vision Model/" and can be tuned live from the dashboard.
+    """
+
+    tunables = ("xy_base", "theta_base", "speed_scale", "max_ambiguity", "max_distance", "max_single_tag_distance",
+                "max_speed", "max_z_error")
+
+    def __init__(self, xy_base: float, theta_base: float, speed_scale: float, max_ambiguity: float,
+                 max_distance: float, max_single_tag_distance: float, max_speed: float, max_z_error: float,
+                 table: str = "Vision Model/"):
+        self.xy_base = xy_base
+        self.theta_base = theta_base
+        self.speed_scale = speed_scale
+        self.max_ambiguity = max_ambiguity
+        self.max_distance = max_distance
+        self.max_single_tag_distance = max_single_tag_distance
+        self.max_speed = max_speed
+        self.max_z_error = max_z_error
+        self._table = table
+        for name in self.tunables:
+            SmartDashboard.putNumber(table + name, getattr(self, name))
+
+    def refresh_tunables(self) -> None:
+        """Pull the current values back from the dashboard."""
+        for name in self.tunables:
+            setattr(self, name, SmartDashboard.getNumber(self._table + name, getattr(self, name)))
+
+    def calculate(self, tag_count: int, average_distance: float, ambiguity: float,
+                  speed: float) -> tuple[float, float, float] | None:
+        """Returns (x, y, theta) std-devs for a measurement, or None if it should be rejected. Ambiguity only
+        applies to single-tag solves."""
+        if tag_count == 0 or average_distance > self.max_distance or speed > self.max_speed:
+            return None
+        if tag_count == 1 and (ambiguity > self.max_ambiguity or average_distance > self.max_single_tag_distance):
+            return None
+
+        scale = average_distance * average_distance / tag_count * (1 + self.speed_scale * speed)
+        xy = self.xy_base * scale
+        theta = self.theta_base * scale if tag_count > 1 else 9999999999999999999
+        return xy, xy, theta
@@ -0,0 +1,83 @@
+from collections import deque
+from time import perf_counter
+
+from phoenix6 import utils
+from photonlibpy.estimatedRobotPose import EstimatedRobotPose
+from photonlibpy.photonCamera import PhotonCamera
+from photonlibpy.photonPoseEstimator import PhotonPoseEstimator
+from photonlibpy.targeting import PhotonPipelineResult
+from wpilib import Notifier
+
+
+class VisionFrame:
+    """One camera result with its pose estimate (None if there was none) and its timestamp converted to the
+    get_current_time_seconds() timebase used by odometry. Frames from the vision process (helpers.vision_process)
+    arrive already screened, with the candidate pose in place of the estimate and a compact copy of the targets as
+    the result."""
+
+    def __init__(self, camera_index: int, result: PhotonPipelineResult, estimated_pose: EstimatedRobotPose | None,
+                 timestamp: float, has_pose: bool | None = None, candidate=None):
+        self.camera_index = camera_index
+        self.result = result
+        self.estimated_pose = estimated_pose
+        self.timestamp = timestamp
+        self.has_pose = estimated_pose is not None if has_pose is None else has_pose
+        self.screened = has_pose is not None
+        self.candidate = candidate
+
+
+class CameraStats:
+    """Counters for one camera. The worker thread writes frames, latency and processing time; the robot loop
+    writes the accept and reject counts."""
+
+    def __init__(self):
+        self.frames = 0
+        self.dropped_frames = 0
+        self.accepted = 0
+        self.rejected = 0
+        self.gated = 0
+        self.latency = 0.0
+        self.processing_time = 0.0
+
+
+class VisionWorker:
+    """
+    Reads one camera off the main loop. A Notifier thread drains every unread result from the camera, runs pose
+    estimation on it and appends a VisionFrame to a deque shared by all cameras. The robot loop pops frames off
+    the other end. deque append and popleft are atomic, so neither side takes a lock and the loop never waits on
+    NetworkTables. The deque is bounded; if the loop stops draining it the oldest frames are dropped and counted.
+    """
+
+    def __init__(self, camera_index: int, camera: PhotonCamera, estimator: PhotonPoseEstimator,
+                 queue: deque[VisionFrame], stats: CameraStats, period: float, estimate_poses: bool):
+        self.camera_index = camera_index
+        self.camera = camera
+        self.estimator = estimator
+        self.queue = queue
+        self.stats = stats
+        self.period = period
+        self.estimate_poses = estimate_poses
+        self._notifier = Notifier(self._poll)
+        self._notifier.setName("Vision " + camera.getName())
+
+    def start(self) -> None:
+        self._notifier.startPeriodic(self.period)
+
+    def stop(self) -> None:
+        self._notifier.stop()
+
+    def _poll(self) -> None:
+        start = perf_counter()
+        queue = self.queue
+        stats = self.stats
+        results = self.camera.getAllUnreadResults()
+        for result in results:
+            estimated_pose = self.estimator.update(result) if self.estimate_poses else None
+            if len(queue) == queue.maxlen:
+                stats.dropped_frames += 1
+            timestamp = utils.fpga_to_current_time(result.getTimestampSeconds())
+            queue.append(VisionFrame(self.camera_index, result, estimated_pose, timestamp))
+            stats.latency = utils.get_current_time_seconds() - timestamp
+        if results:
+            stats.frames += len(results)
+            stats.processing_time = perf_counter() - start
@@ -1,20 +1,29 @@
-from commands2 import Command, CommandScheduler, TimedCommandRobot, cmd
+from helpers.boot_profiler import boot
+boot.track_imports()
+
+from commands2 import Command, CommandScheduler, cmd
 from robotcontainer import RobotContainer
-from wpilib import run, RobotBase, SmartDashboard
+from wpilib import run, RobotBase, SmartDashboard, TimedRobot, DataLogManager, DriverStation
 from phoenix6 import SignalLogger, utils
 from ntcore import NetworkTableInstance
 from wpimath.geometry import Pose2d, Translation2d, Rotation2d
 from helpers import elasticlib
+from helpers.field_context import field
+from helpers.loop_profiler import LoopProfiler
+from helpers.loop_watchdog import LoopWatchdog
+from constants import ProfilerConstants, LoopConstants, WatchdogConstants
 from wpimath.units import inchesToMeters, degreesToRadians
 
 
-class Robot(TimedCommandRobot):
+class Robot(TimedRobot):
     """This class allows the programmer to control what runs in each individual robot operation mode."""
     m_autonomous_command: Command  # Definition for autonomous command groups used in autonomousInit
     m_robotcontainer: RobotContainer  # Type-check for robotcontainer class
+    profiler: LoopProfiler | None  # Loop-time profiler for the scheduler, None when disabled
+    watchdog: LoopWatchdog | None  # Overrun watchdog, needs the profiler for culprit attribution
 
-    # Scheduler frequency delay
-    CommandScheduler.getInstance().setPeriod(0.04)
+    # Scheduler overrun warning threshold
+    CommandScheduler.getInstance().setPeriod(LoopConstants.period)
 
     # Notification setup for Elastic
     teleop_notification = elasticlib.Notification(level="INFO", title="Teleop activated!",
@@ -24,25 +33,71 @@ class Robot(TimedCommandRobot):
     test_notification = elasticlib.Notification(level="INFO", title="Test activated!",
                                                 description="The robot is now in test mode.", display_time=3000)
 
+    def __init__(self) -> None:
+        # The scheduler is run once per loop from robotPeriodic, so this is a plain TimedRobot rather than a
+        # TimedCommandRobot (which would add a second scheduler run every loop).
+        super().__init__(LoopConstants.period)
+
     def robotInit(self) -> None:
         """Initialize the robot through the RobotContainer object and prep the default autonomous command (None)"""
-        self.m_robotcontainer = RobotContainer()
+        boot.mark("Imports")
+        with boot.phase("RobotContainer"):
+            self.m_robotcontainer = RobotContainer()
         self.m_autonomous_command = None
 
+        self.profiler = None
+        self.watchdog = None
+        if ProfilerConstants.enabled:
+            self.profiler = LoopProfiler(ProfilerConstants.window)
+            self.profiler.attach(CommandScheduler.getInstance(),
+                                 [self.m_robotcontainer.leds, self.m_robotcontainer.util,
+                                  self.m_robotcontainer.arm, self.m_robotcontainer.drivetrain])
+            for task in self.m_robotcontainer.rates.callbacks:
+                task.callback = self.profiler.wrap(task.name, task.callback)
+
+            self.watchdog = LoopWatchdog(self.profiler, WatchdogConstants.budget, WatchdogConstants.shed_after,
+                                         WatchdogConstants.window, WatchdogConstants.hold)
+            self.watchdog.add_shed_listener(self.m_robotcontainer.set_load_shedding)
+
+        boot.mark("Loop Instrumentation")
+        boot.stop_import_tracking()
+        for line in boot.report():
+            DataLogManager.log(line)
+        SmartDashboard.putNumber("Boot Time (s)", boot.last_mark - boot.start_time)
+
     def robotPeriodic(self) -> None:
-        """Set the constant robot periodic state (in command based, that's just run the scheduler loop)"""
+        """Set the constant robot periodic state (in command based, that's just run the scheduler loop, plus the
+        slower multi-rate work)"""
+        self.m_robotcontainer.rates.tick()
+        field.refresh()
+        self.m_robotcontainer.drivetrain.refresh_snapshot()
+        if self.profiler is not None:
+            self.profiler.start_loop()
+
         CommandScheduler.getInstance().run()
+        self.m_robotcontainer.rates.run()
+
+        if self.profiler is not None:
+            self.profiler.end_loop()
+            self.watchdog.check()
+
+        if boot.restart_to_drivable < 0 and DriverStation.isEnabled():
+            boot.mark_drivable()
+            DataLogManager.log(f"Restart to drivable: {boot.restart_to_drivable:.3f}s")
+            SmartDashboard.putNumber("Restart To Drivable (s)", boot.restart_to_drivable)
 
     def disabledInit(self) -> None:
-        """Nothing is written here yet. Probably will not modify unless something is required for end-of-match."""
+        """Driver bindings go back to the teleop set so pre-match buttons (pose reset, LEDs) work while disabled."""
+        self.m_robotcontainer.set_binding_mode("teleop")
 
     def disabledPeriodic(self) -> None:
-        """This isn't the most useful state to call anything in because you can set commands to run in disabled.
-        So it's not really anything at all right now."""
+        """Finishes the boot work that was deferred until after the robot could drive (auto chooser)."""
+        self.m_robotcontainer.build_auto_chooser()
 
     def autonomousInit(self) -> None:
         """Run the auto scheduler if the command was actually input. For the most part, this is a safety call."""
         self.m_autonomous_command = self.m_robotcontainer.get_autonomous_command()
+        self.m_robotcontainer.set_binding_mode("auto")
         elasticlib.select_tab("Autonomous")
         elasticlib.send_notification(self.auto_notification)
 
@@ -59,6 +114,7 @@ class Robot(TimedCommandRobot):
             self.m_autonomous_command.cancel()
         cmd.runOnce(lambda: self.m_robotcontainer.drivetrain.reset_clt(),
                     self.m_robotcontainer.drivetrain).schedule()
+        self.m_robotcontainer.set_binding_mode("teleop")
         elasticlib.select_tab("Teleoperated")
         elasticlib.send_notification(self.teleop_notification)
         self.m_robotcontainer.leds.set_state("default")
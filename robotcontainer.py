@@ -1,15 +1,18 @@
 from commands2.cmd import run, runOnce, runEnd
 import wpilib.simulation
-from commands2 import Command, button, SequentialCommandGroup, ParallelCommandGroup, ParallelRaceGroup, sysid, \
-    InterruptionBehavior, ParallelDeadlineGroup, WaitCommand, ConditionalCommand
+from commands2 import Command, CommandScheduler, button, SequentialCommandGroup, ParallelCommandGroup, \
+    ParallelRaceGroup, sysid, InterruptionBehavior, ParallelDeadlineGroup, WaitCommand, ConditionalCommand
 
-from constants import OIConstants
+from constants import OIConstants, LoopConstants
+from helpers.multirate import MultiRateScheduler
+from helpers.boot_profiler import boot
 from subsystems.armsubsystem import ArmSubsystem
 from subsystems.ledsubsystem import LEDs
 from subsystems.utilsubsystem import UtilSubsystem
 from subsystems.command_swerve_drivetrain import ResetCLT, SetRotation, SetCLTTarget
 from wpilib import SmartDashboard, SendableChooser, DriverStation, DataLogManager, Timer, Alert, Joystick, \
     XboxController
+from wpilib.event import EventLoop
 from wpimath.filter import SlewRateLimiter
 from pathplannerlib.auto import NamedCommands, AutoBuilder
 
@@ -27,7 +30,6 @@ from commands.check_drivetrain import CheckDrivetrain
 from commands.alignment_leds import AlignmentLEDs
 from commands.profiled_target import ProfiledTarget
 from commands.auto_alignment_multi_feedback import AutoAlignmentMultiFeedback
-from commands.wheel_radius_calculator import WheelRadiusCalculator
 from commands.start_auto_timer import StartAutoTimer
 from commands.stop_auto_timer import StopAutoTimer
 from commands.pathfollowing_endpoint import PathfollowingEndpointClose
@@ -68,15 +70,26 @@ class RobotContainer:
             SignalLogger.stop()
 
         # Startup subsystems. ------------------------------------------------------------------------------------------
-        self.leds = LEDs(self.timer)
-        self.util = UtilSubsystem()
-        self.arm = ArmSubsystem()
+        with boot.phase("Subsystems"):
+            self.leds = LEDs(self.timer)
+            self.util = UtilSubsystem()
+            self.arm = ArmSubsystem()
 
         # Setup driver & operator controllers. -------------------------------------------------------------------------
         self.driver_controller = button.CommandXboxController(OIConstants.kDriverControllerPort)
         self.operator_controller = button.CommandXboxController(OIConstants.kOperatorControllerPort)
         DriverStation.silenceJoystickConnectionWarning(True)
-        self.test_bindings = False
+
+        # Driver bindings are split by robot mode and only the active mode's triggers are polled. The mode loop is
+        # polled from the scheduler's default loop so triggers bound there (PathPlanner events) keep working. The auto
+        # set has no driver bindings, so nothing is polled for the driver during autonomous. Commands started by a
+        # mode's bindings are tracked so they can be cancelled when the mode is left (see set_binding_mode).
+        self.button_loops = {"teleop": EventLoop(), "test": EventLoop(), "auto": EventLoop()}
+        self.binding_mode = "teleop"
+        self.binding_commands: dict[str, set[Command]] = {mode: set() for mode in self.button_loops}
+        self._polling_bindings = False
+        CommandScheduler.getInstance().getDefaultButtonLoop().bind(self.poll_active_bindings)
+        CommandScheduler.getInstance().onCommandInitialize(self._track_binding_command)
 
         # Configure drivetrain settings. -------------------------------------------------------------------------------
         self._max_speed = TunerConstants.speed_at_12_volts  # speed_at_12_volts desired top speed
@@ -84,7 +97,8 @@ class RobotContainer:
 
         self._logger = Telemetry(self._max_speed)
 
-        self.drivetrain = TunerConstants.create_drivetrain()
+        with boot.phase("Drivetrain"):
+            self.drivetrain = TunerConstants.create_drivetrain()
 
         self._drive = (
             swerve.requests.FieldCentric()  # I want field-centric
@@ -106,24 +120,36 @@ class RobotContainer:
         self._hold_heading.heading_controller.setTolerance(0.1)  # 0.1
 
         # Register commands for PathPlanner. ---------------------------------------------------------------------------
-        self.registerCommands()
+        with boot.phase("Named Commands"):
+            self.registerCommands()
 
         SmartDashboard.putBoolean("Misalignment Indicator Active?", False)
         SmartDashboard.putNumber("Misalignment Angle", 0)
 
         # Setup for all event-trigger commands. ------------------------------------------------------------------------
+        # Test-mode bindings are built the first time test mode is entered.
         # self.configureTriggersSmartDash()
-        self.configure_test_bindings()
-        self.configure_triggers()
+        self.test_bindings_configured = False
+        with boot.phase("Bindings"):
+            self.configure_triggers()
+
+        # Setup multi-rate work. Drivetrain control stays on every loop. -----------------------------------------------
+        self.rates = MultiRateScheduler(LoopConstants.period)
+        self.leds.periodic = self.rates.gate("LEDs", self.leds.periodic, LoopConstants.led_period)
+        self.rates.add("Vision", self.drivetrain.update_vision, LoopConstants.vision_period, critical=True)
+        self.rates.add("Arm Dashboard", self.arm.publish_dashboard, LoopConstants.dashboard_period)
 
         # Setup autonomous selector on the dashboard. ------------------------------------------------------------------
-        self.m_chooser = AutoBuilder.buildAutoChooser("DoNothing")
-        SmartDashboard.putData("Auto Select", self.m_chooser)
+        # Loading every auto is slow and not needed to drive, so the chooser is built after boot (see
+        # build_auto_chooser).
+        self.m_chooser = None
 
         self.drive_filter_x = SlewRateLimiter(3, -3, 0)
         self.drive_filter_y = SlewRateLimiter(3, -3, 0)
 
     def configure_triggers(self) -> None:
+        teleop = self.button_loops["teleop"]
+
         # NON CLT DRIVING
         # self.drivetrain.setDefaultCommand(  # Drivetrain will execute this command periodically
         #     self.drivetrain.apply_request(
@@ -173,7 +199,7 @@ class RobotContainer:
             )
 
 
-        self.driver_controller.a().and_(lambda: not self.test_bindings).whileTrue(
+        self.driver_controller.a(loop=teleop).whileTrue(
             self.drivetrain.apply_request(
                 lambda: (self.drivetrain.profiled_rotation_to_vis_target())
             )
@@ -184,7 +210,7 @@ class RobotContainer:
             )
         )
 
-        self.driver_controller.rightTrigger().and_(lambda: not self.test_bindings).whileTrue(
+        self.driver_controller.rightTrigger(loop=teleop).whileTrue(
             self.drivetrain.apply_request(
                 lambda: (
                     self.drivetrain.drive_clt(
@@ -198,34 +224,35 @@ class RobotContainer:
             )
         )
 
-        # POV Snap mode
-        self.driver_controller.povUp().onTrue(
-            SetCLTTarget(self.drivetrain, Rotation2d.fromDegrees(180))
-        )
-        self.driver_controller.povUpLeft().onTrue(
-            SetCLTTarget(self.drivetrain, Rotation2d.fromDegrees(225))
-        )
-        self.driver_controller.povLeft().onTrue(
-            SetCLTTarget(self.drivetrain, Rotation2d.fromDegrees(270))
-        )
-        self.driver_controller.povDownLeft().onTrue(
-            SetCLTTarget(self.drivetrain, Rotation2d.fromDegrees(315))
-        )
-        self.driver_controller.povRight().onTrue(
-            SetCLTTarget(self.drivetrain, Rotation2d.fromDegrees(90))
-        )
-        self.driver_controller.povDownRight().onTrue(
-            SetCLTTarget(self.drivetrain, Rotation2d.fromDegrees(45))
-        )
-        self.driver_controller.povUpRight().onTrue(
-            SetCLTTarget(self.drivetrain, Rotation2d.fromDegrees(135))
-        )
-        self.driver_controller.povDown().onTrue(
-            SetCLTTarget(self.drivetrain, Rotation2d.fromDegrees(0))
-        )
+        # POV Snap mode, also available in test mode.
+        for loop in (teleop, self.button_loops["test"]):
+            self.driver_controller.pov(0, loop=loop).onTrue(
+                SetCLTTarget(self.drivetrain, Rotation2d.fromDegrees(180))
+            )
+            self.driver_controller.pov(315, loop=loop).onTrue(
+                SetCLTTarget(self.drivetrain, Rotation2d.fromDegrees(225))
+            )
+            self.driver_controller.pov(270, loop=loop).onTrue(
+                SetCLTTarget(self.drivetrain, Rotation2d.fromDegrees(270))
+            )
+            self.driver_controller.pov(225, loop=loop).onTrue(
+                SetCLTTarget(self.drivetrain, Rotation2d.fromDegrees(315))
+            )
+            self.driver_controller.pov(90, loop=loop).onTrue(
+                SetCLTTarget(self.drivetrain, Rotation2d.fromDegrees(90))
+            )
+            self.driver_controller.pov(135, loop=loop).onTrue(
+                SetCLTTarget(self.drivetrain, Rotation2d.fromDegrees(45))
+            )
+            self.driver_controller.pov(45, loop=loop).onTrue(
+                SetCLTTarget(self.drivetrain, Rotation2d.fromDegrees(135))
+            )
+            self.driver_controller.pov(180, loop=loop).onTrue(
+                SetCLTTarget(self.drivetrain, Rotation2d.fromDegrees(0))
+            )
 
         # Reset pose.
-        self.driver_controller.y().and_(lambda: not self.test_bindings).onTrue(
+        self.driver_controller.y(loop=teleop).onTrue(
             SequentialCommandGroup(
                 runOnce(lambda: self.drivetrain.reset_odometry(), self.drivetrain).ignoringDisable(True),
                 ResetCLT(self.drivetrain).ignoringDisable(True)
@@ -233,14 +260,14 @@ class RobotContainer:
         )
 
         # Auto Alignment
-        self.driver_controller.b().and_(lambda: not self.test_bindings).whileTrue(
+        self.driver_controller.b(loop=teleop).whileTrue(
             AutoAlignmentMultiFeedback(self.drivetrain, self.util, self.driver_controller, False)
         ).onFalse(
             ResetCLT(self.drivetrain)
         ).onTrue(
             runOnce(lambda: self.arm.set_state("shoot"), self.arm)
         )
-        self.driver_controller.x().and_(lambda: not self.test_bindings).whileTrue(
+        self.driver_controller.x(loop=teleop).whileTrue(
             AutoAlignmentMultiFeedback(self.drivetrain, self.util, self.driver_controller, True)
         ).onFalse(
             ResetCLT(self.drivetrain)
@@ -249,7 +276,7 @@ class RobotContainer:
         )
 
         # Human player LEDs
-        self.driver_controller.start().and_(lambda: not self.test_bindings).onTrue(
+        self.driver_controller.start(loop=teleop).onTrue(
             SequentialCommandGroup(
                 runOnce(lambda: self.leds.set_flash_color_rate(15), self.leds),
                 runOnce(lambda: self.leds.set_flash_color_color([255, 255, 255]), self.leds),
@@ -260,24 +287,24 @@ class RobotContainer:
         )
 
         # Reset all pose based on vision data.
-        self.driver_controller.back().and_(lambda: not self.test_bindings).onTrue(
-            runOnce(lambda: self.drivetrain.select_best_vision_pose((0.00001, 0.00001, 0.00001)))
+        self.driver_controller.back(loop=teleop).onTrue(
+            runOnce(lambda: self.drivetrain.reset_pose_from_vision((0.00001, 0.00001, 0.00001)))
         )
 
         # Drivetrain brake mode.
-        self.driver_controller.leftTrigger().and_(lambda: not self.test_bindings).whileTrue(
+        self.driver_controller.leftTrigger(loop=teleop).whileTrue(
             self.drivetrain.apply_request(lambda: self._brake)
         )
 
         # Intake with LB.
-        self.driver_controller.leftBumper().and_(lambda: not self.test_bindings).onTrue(
+        self.driver_controller.leftBumper(loop=teleop).onTrue(
             runOnce(lambda: self.arm.set_state("intake"), self.arm)
         ).onFalse(
             runOnce(lambda: self.arm.set_state("stow"), self.arm)
         )
 
         # Shoot
-        self.driver_controller.rightBumper().and_(lambda: not self.test_bindings).onTrue(
+        self.driver_controller.rightBumper(loop=teleop).onTrue(
             Shoot(self.drivetrain, self.arm, self.leds)
         )
 
@@ -311,49 +338,102 @@ class RobotContainer:
         """Use this to pass the autonomous command to the main Robot class.
         Returns the command to run in autonomous
         """
+        if self.m_chooser is None:
+            self.build_auto_chooser()
         return self.m_chooser.getSelected()
 
+    def build_auto_chooser(self) -> None:
+        """Load the autos and publish the selector. Safe to call repeatedly, only the first call does any work.
+        Runs after the boot report is logged, so its phase time is logged here."""
+        if self.m_chooser is not None:
+            return
+        with boot.phase("Auto Chooser"):
+            self.m_chooser = AutoBuilder.buildAutoChooser("DoNothing")
+            SmartDashboard.putData("Auto Select", self.m_chooser)
+        duration = boot.phases["Auto Chooser"]
+        DataLogManager.log(f"Boot phase Auto Chooser (deferred): {duration * 1000:.1f}ms")
+        SmartDashboard.putNumber("Auto Chooser Build Time (s)", duration)
+
     def configure_test_bindings(self) -> None:
+        from commands.wheel_radius_calculator import WheelRadiusCalculator
+
+        test = self.button_loops["test"]
         self.configure_sys_id()
 
         # Point all modules in a direction
-        self.driver_controller.start().and_(lambda: self.test_bindings).whileTrue(self.drivetrain.apply_request(
+        self.driver_controller.start(loop=test).whileTrue(self.drivetrain.apply_request(
             lambda: self._point.with_module_direction(
                 Rotation2d(-1 * self.driver_controller.getLeftY()
                            - 1 * self.driver_controller.getLeftX()))))
 
-        self.driver_controller.back().and_(lambda: self.test_bindings).onTrue(
+        self.driver_controller.back(loop=test).onTrue(
             WheelRadiusCalculator(self.drivetrain, self.timer)
         )
 
     def configure_sys_id(self) -> None:
-        (self.driver_controller.y().and_(lambda: self.test_bindings).and_(self.driver_controller.rightTrigger())
+        test = self.button_loops["test"]
+        (self.driver_controller.y(loop=test).and_(self.driver_controller.rightTrigger())
          .whileTrue(self.drivetrain.sys_id_translation_quasistatic(sysid.SysIdRoutine.Direction.kForward)))
-        (self.driver_controller.b().and_(lambda: self.test_bindings).and_(self.driver_controller.rightTrigger())
+        (self.driver_controller.b(loop=test).and_(self.driver_controller.rightTrigger())
          .whileTrue(self.drivetrain.sys_id_translation_quasistatic(sysid.SysIdRoutine.Direction.kReverse)))
-        (self.driver_controller.a().and_(lambda: self.test_bindings).and_(self.driver_controller.rightTrigger())
+        (self.driver_controller.a(loop=test).and_(self.driver_controller.rightTrigger())
          .whileTrue(self.drivetrain.sys_id_translation_dynamic(sysid.SysIdRoutine.Direction.kForward)))
-        (self.driver_controller.x().and_(lambda: self.test_bindings).and_(self.driver_controller.rightTrigger())
+        (self.driver_controller.x(loop=test).and_(self.driver_controller.rightTrigger())
          .whileTrue(self.drivetrain.sys_id_translation_dynamic(sysid.SysIdRoutine.Direction.kReverse)))
-        (self.driver_controller.y().and_(lambda: self.test_bindings).and_(self.driver_controller.rightBumper())
+        (self.driver_controller.y(loop=test).and_(self.driver_controller.rightBumper())
          .whileTrue(self.drivetrain.sys_id_rotation_quasistatic(sysid.SysIdRoutine.Direction.kForward)))
-        (self.driver_controller.b().and_(lambda: self.test_bindings).and_(self.driver_controller.rightBumper())
+        (self.driver_controller.b(loop=test).and_(self.driver_controller.rightBumper())
          .whileTrue(self.drivetrain.sys_id_rotation_quasistatic(sysid.SysIdRoutine.Direction.kReverse)))
-        (self.driver_controller.a().and_(lambda: self.test_bindings).and_(self.driver_controller.rightBumper())
+        (self.driver_controller.a(loop=test).and_(self.driver_controller.rightBumper())
          .whileTrue(self.drivetrain.sys_id_rotation_dynamic(sysid.SysIdRoutine.Direction.kForward)))
-        (self.driver_controller.x().and_(lambda: self.test_bindings).and_(self.driver_controller.rightBumper())
+        (self.driver_controller.x(loop=test).and_(self.driver_controller.rightBumper())
          .whileTrue(self.drivetrain.sys_id_rotation_dynamic(sysid.SysIdRoutine.Direction.kReverse)))
-        (self.driver_controller.y().and_(lambda: self.test_bindings).and_(self.driver_controller.leftBumper())
+        (self.driver_controller.y(loop=test).and_(self.driver_controller.leftBumper())
          .whileTrue(self.drivetrain.sys_id_steer_quasistatic(sysid.SysIdRoutine.Direction.kForward)))
-        (self.driver_controller.b().and_(lambda: self.test_bindings).and_(self.driver_controller.leftBumper())
+        (self.driver_controller.b(loop=test).and_(self.driver_controller.leftBumper())
          .whileTrue(self.drivetrain.sys_id_steer_quasistatic(sysid.SysIdRoutine.Direction.kReverse)))
-        (self.driver_controller.a().and_(lambda: self.test_bindings).and_(self.driver_controller.leftBumper())
+        (self.driver_controller.a(loop=test).and_(self.driver_controller.leftBumper())
          .whileTrue(self.drivetrain.sys_id_steer_dynamic(sysid.SysIdRoutine.Direction.kForward)))
-        (self.driver_controller.x().and_(lambda: self.test_bindings).and_(self.driver_controller.leftBumper())
+        (self.driver_controller.x(loop=test).and_(self.driver_controller.leftBumper())
          .whileTrue(self.drivetrain.sys_id_steer_dynamic(sysid.SysIdRoutine.Direction.kReverse)))
 
     def enable_test_bindings(self, enabled: bool) -> None:
-        self.test_bindings = enabled
+        if enabled and not self.test_bindings_configured:
+            self.configure_test_bindings()
+            self.test_bindings_configured = True
+        self.set_binding_mode("test" if enabled else "teleop")
+
+    def set_binding_mode(self, mode: str) -> None:
+        """Switch which set of driver bindings is polled: "teleop" (also used while disabled), "test" or "auto".
+        Commands the old set's bindings started are cancelled, since their whileTrue/onFalse edges will never be
+        seen. The new set is polled once with the scheduler disabled, so its triggers pick up the current button
+        state without scheduling anything for buttons that changed while it was not polled."""
+        if mode == self.binding_mode:
+            return
+        scheduler = CommandScheduler.getInstance()
+        scheduler.cancel(*[command for command in self.binding_commands[self.binding_mode]
+                           if scheduler.isScheduled(command)])
+        self.binding_commands[self.binding_mode].clear()
+        self.binding_mode = mode
+        scheduler.disable()
+        self.button_loops[mode].poll()
+        scheduler.enable()
+
+    def poll_active_bindings(self) -> None:
+        self._polling_bindings = True
+        self.button_loops[self.binding_mode].poll()
+        self._polling_bindings = False
+
+    def _track_binding_command(self, command: Command) -> None:
+        if self._polling_bindings:
+            self.binding_commands[self.binding_mode].add(command)
+
+    def set_load_shedding(self, shedding: bool) -> None:
+        """Stop or resume non-critical work (LEDs, dashboards, Mechanism2d) when the loop watchdog detects overload.
+        Drivetrain control is never shed."""
+        self.rates.set_shedding(shedding)
+        self._logger.set_shedding(shedding)
+        self.drivetrain.set_dashboard_shed(shedding)
 
     def check_endpoint_closed(self) -> bool:
         return self.drivetrain.endpoint[0] - 0.02 < self.drivetrain.get_pose().x < self.drivetrain.endpoint[
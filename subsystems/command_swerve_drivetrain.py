@@ -2,7 +2,19 @@ import math
 from typing import Callable, overload
 
 from commands2 import Command, Subsystem, sysid
-from constants import AutoConstants
+from constants import AutoConstants, EstimatorConstants, LoopConstants, ShotConstants, VisionConstants
+from helpers.kinematic_estimator import KinematicEstimator
+from helpers.pose_history import PoseHistory
+from helpers.shot_solver import ShotSolution, ShotSolver
+from helpers.camera_registry import CameraRegistry
+from helpers.field_context import field
+from helpers.tag_index import TagIndex
+from helpers.target_range import TargetRange, TargetRangeEstimator
+from helpers.vision_gate import VisionGate
+from helpers.vision_log import VisionRecorder
+from helpers.vision_process import VisionProcessClient
+from helpers.vision_processor import VisionProcessor
+from helpers.vision_std_devs import VisionStdDevModel
 from pathplannerlib.auto import AutoBuilder
 from pathplannerlib.config import PIDConstants, RobotConfig
 from pathplannerlib.controller import PPHolonomicDriveController
@@ -10,19 +22,43 @@ from pathplannerlib.path import PathConstraints
 from phoenix6 import swerve, units, utils, SignalLogger
 from wpilib import DriverStation, Notifier, RobotController, SmartDashboard
 from wpilib.sysid import SysIdRoutineLog
-from wpimath.geometry import Rotation2d, Pose2d, Transform3d, Translation3d, Rotation3d
-from wpimath.units import degreesToRadians, inchesToMeters, metersToInches
+from wpimath.geometry import Rotation2d, Pose2d
+from wpimath.kinematics import ChassisSpeeds
+from wpimath.units import degreesToRadians, metersToInches
 from wpimath.controller import ProfiledPIDController
 from wpimath.trajectory import TrapezoidProfile
 
 
 from robotpy_apriltag import AprilTagFieldLayout, AprilTagField
-from photonlibpy import photonCamera, photonPoseEstimator
+from photonlibpy import photonPoseEstimator
+from photonlibpy.photonCamera import PhotonCamera
 if utils.is_simulation():
-   from photonlibpy.simulation import VisionSystemSim, SimCameraProperties, PhotonCameraSim
+   from helpers.sim_vision import SimVision
 # from wpiutil import Sendable, SendableBuilder
 
 
+class DrivetrainSnapshot:
+    """
+    Drivetrain state captured once per scheduler cycle, so every subsystem and command reading it during a loop
+    sees the same values. Velocities and accelerations are given both field-relative and robot-relative.
+    """
+
+    def __init__(self):
+        self.timestamp = 0.0
+        self.pose = Pose2d()
+        self.raw_heading = 0.0
+        self.speeds = ChassisSpeeds()
+        self.vx = 0.0
+        self.vy = 0.0
+        self.omega = 0.0
+        self.ax = 0.0
+        self.ay = 0.0
+        self.alpha = 0.0
+        self.ax_robot = 0.0
+        self.ay_robot = 0.0
+        self.alpha_robot = 0.0
+
+
 class CommandSwerveDrivetrain(Subsystem, swerve.SwerveDrivetrain):
     """
     Class that extends the Phoenix 6 SwerveDrivetrain class and implements
@@ -156,27 +192,18 @@ class CommandSwerveDrivetrain(Subsystem, swerve.SwerveDrivetrain):
         self.pathplanner_rotation_overridden = False
         self.configure_pathplanner()
 
-        # Setup for velocity and acceleration calculations.
+        # Setup for the per-loop state snapshot. Velocity and acceleration are estimated on the odometry thread.
         self.lookahead_active = False
-        self.loop_time = utils.get_current_time_seconds()
-        self.vx_old = 0
-        self.vy_old = 0
-        self.omega_old = 0
-        self.vx_new = 0
-        self.vy_new = 0
-        self.omega_new = 0
-        self.ax = 0
-        self.ay = 0
-        self.alpha = 0
-        self.vx_robot_new = 0
-        self.vy_robot_new = 0
-        self.omega_robot_new = 0
-        self.vx_robot_old = 0
-        self.vy_robot_old = 0
-        self.omega_robot_old = 0
-        self.ax_robot = 0
-        self.ay_robot = 0
-        self.alpha_robot = 0
+        self.kinematic_estimator = KinematicEstimator(EstimatorConstants.velocity_time_constant,
+                                                      EstimatorConstants.acceleration_time_constant)
+        self.pose_history = PoseHistory(EstimatorConstants.pose_history_size)
+        self.vision_recorder: VisionRecorder | None = None
+        self.shot_solver = ShotSolver(ShotConstants.time_of_flight_table, ShotConstants.release_delay,
+                                      ShotConstants.max_iterations, ShotConstants.tolerance,
+                                      ShotConstants.min_distance, ShotConstants.max_distance,
+                                      ShotConstants.max_speed)
+        self.register_telemetry(None)
+        self.snapshot = DrivetrainSnapshot()
 
         # Configure closed loop turning controller.
         self.clt_request = (
@@ -195,6 +222,9 @@ class CommandSwerveDrivetrain(Subsystem, swerve.SwerveDrivetrain):
         self.saved_request = None
         self.endpoint = [0, 0]
 
+        # Request owned by the command currently driving the robot (see set_request_slot).
+        self.request_slot: swerve.requests.SwerveRequest | None = None
+
         # Configure persistent alerts.
         # alert_photonvision_enabled = Alert("PhotonVision Simulation Enabled", Alert.AlertType.kWarning)
 
@@ -266,33 +296,48 @@ class CommandSwerveDrivetrain(Subsystem, swerve.SwerveDrivetrain):
         )
 
         april_tag_field_layout = AprilTagFieldLayout.loadField(AprilTagField.k2025ReefscapeWelded)
-        cam1 = photonCamera.PhotonCamera("FRONT_ALIGN")
-        robot_to_cam1 = Transform3d(Translation3d(inchesToMeters(5),inchesToMeters(0),  inchesToMeters(6)),
-                                    Rotation3d(0, degreesToRadians(0), degreesToRadians(0)))
-
-        photon_pose_cam1 = (
-           photonPoseEstimator.PhotonPoseEstimator(april_tag_field_layout,
-                                                   photonPoseEstimator.PoseStrategy.MULTI_TAG_PNP_ON_COPROCESSOR,
-                                                   cam1,
-                                                   robot_to_cam1))
-
-        self.photon_cam_array = [cam1]
-        self.photon_pose_array = [photon_pose_cam1]
-
-        self.used_tags = [6, 7, 8, 9, 10, 11, 17, 18, 19, 20, 21, 22]
-        # self.used_tags = [2]
-
-        self.tag_seen = False
-
-        self.target_yaw = -100000
-        self.target_range = -100000
-        self.target_id = -100000
-        self.target_in_view = False
-
-        self.ptttc = ProfiledPIDController(0.1, 0, 0, TrapezoidProfile.Constraints(10, 2), 0.04)
+        self.tag_index = TagIndex(april_tag_field_layout, VisionConstants.red_reef_tags,
+                                  VisionConstants.blue_reef_tags)
+        if VisionConstants.use_process:
+            self.cameras = VisionProcessClient(VisionConstants.cameras,
+                                               photonPoseEstimator.PoseStrategy.MULTI_TAG_PNP_ON_COPROCESSOR,
+                                               VisionConstants.worker_period, VisionConstants.ring_capacity,
+                                               VisionConstants.fuse_poses, VisionConstants.process_stand_in,
+                                               VisionConstants.stand_in_fps, VisionConstants.stand_in_load,
+                                               VisionConstants.stand_in_pose)
+        else:
+            self.cameras = CameraRegistry(VisionConstants.cameras, april_tag_field_layout,
+                                          photonPoseEstimator.PoseStrategy.MULTI_TAG_PNP_ON_COPROCESSOR,
+                                          VisionConstants.worker_period, VisionConstants.max_queued_frames,
+                                          VisionConstants.fuse_poses)
+        self.vision_model = VisionStdDevModel(VisionConstants.xy_std_dev_base, VisionConstants.theta_std_dev_base,
+                                              VisionConstants.speed_std_dev_scale, VisionConstants.max_ambiguity,
+                                              VisionConstants.max_tag_distance,
+                                              VisionConstants.max_single_tag_distance,
+                                              VisionConstants.max_vision_speed, VisionConstants.max_z_error)
+        self.vision_gate = VisionGate(VisionConstants.gate_chi_squared, VisionConstants.gate_heading,
+                                      VisionConstants.gate_odometry_std_dev,
+                                      VisionConstants.gate_max_consecutive_rejects, len(self.cameras.cameras))
+        self.vision = VisionProcessor(self.tag_index, self.vision_model, self.vision_gate, self.pose_history,
+                                      [camera.stats for camera in self.cameras.cameras],
+                                      [camera.alignment for camera in self.cameras.cameras],
+                                      TargetRangeEstimator(self.tag_index, [camera.robot_to_camera
+                                                                            for camera in self.cameras.cameras]),
+                                      self.add_vision_measurement, VisionConstants.fuse_poses,
+                                      VisionConstants.target_timeout)
+        if VisionConstants.record and not VisionConstants.use_process:
+            self.vision_recorder = VisionRecorder.in_log_directory([camera.name for camera in self.cameras.cameras])
+            self.vision_recorder.record_tag_mask(utils.get_current_time_seconds(), self.vision.used_tag_mask)
+
+        self.dashboard_shed = False
+        self.refresh_snapshot()
+
+        self.ptttc = ProfiledPIDController(0.1, 0, 0, TrapezoidProfile.Constraints(10, 2),
+                                           LoopConstants.period)
         self.ptttc.reset(0)
         self.ptttc.setGoal(0)
         self.ptttc.setTolerance(0.5)
+        self.ptttc_needs_reset = True
         self.ptttc_request = (
             swerve.requests.RobotCentric()
             .with_drive_request_type(swerve.SwerveModule.DriveRequestType.VELOCITY)
@@ -304,16 +349,14 @@ class CommandSwerveDrivetrain(Subsystem, swerve.SwerveDrivetrain):
 
         if utils.is_simulation():
            # alert_photonvision_enabled.set(True)
-           self.vision_sim = VisionSystemSim("main")
-           self.vision_sim.addAprilTags(AprilTagFieldLayout.loadField(AprilTagField.k2025ReefscapeAndyMark))
-           camera_prop = SimCameraProperties()
-           camera_prop.setCalibrationFromFOV(1280, 800, Rotation2d.fromDegrees(75))
-           camera_prop.setCalibError(0.01, 0.01)
-           camera_prop.setFPS(15)
-           camera_prop.setAvgLatency(0.01)
-           camera_prop.setLatencyStdDev(0.01)
-           cam1_sim = PhotonCameraSim(cam1, camera_prop)
-           self.vision_sim.addCamera(cam1_sim, robot_to_cam1)
+           self.sim_vision = SimVision([(camera.camera or PhotonCamera(camera.name), camera.robot_to_camera)
+                                        for camera in self.cameras.cameras],
+                                       AprilTagFieldLayout.loadField(AprilTagField.k2025ReefscapeAndyMark),
+                                       VisionConstants.sim_fps, VisionConstants.sim_resolution,
+                                       VisionConstants.sim_fov, VisionConstants.sim_max_skip_time)
+           self.sim_vision.start(lambda: self.get_state().pose)
+
+        self.cameras.start()
 
 
     def apply_request(self, request: Callable[[], swerve.requests.SwerveRequest]) -> Command:
@@ -327,6 +370,24 @@ class CommandSwerveDrivetrain(Subsystem, swerve.SwerveDrivetrain):
         """
         return self.run(lambda: self.set_control(request()))
 
+    def set_request_slot(self, request: swerve.requests.SwerveRequest) -> None:
+        """
+        Apply a request owned by the running command. Commands that drive the robot require the drivetrain, build
+        their request once, update it in place with its with_* methods and hand it back here every loop, so driving
+        costs a field update instead of a new command going through the scheduler each loop.
+
+        :param request: Request to apply, reused by the caller from loop to loop
+        :type request: swerve.requests.SwerveRequest
+        """
+        self.request_slot = request
+        self.set_control(request)
+
+    def release_request_slot(self, final_request: swerve.requests.SwerveRequest) -> None:
+        """Apply one last request (usually a stop) as the owning command ends. The default command takes over on
+        the next loop."""
+        self.set_control(final_request)
+        self.request_slot = None
+
     def periodic(self):
         # Periodically try to apply the operator perspective.
         # If we haven't applied the operator perspective before, then we should apply it regardless of DS state.
@@ -334,160 +395,156 @@ class CommandSwerveDrivetrain(Subsystem, swerve.SwerveDrivetrain):
         # Otherwise, only check and apply the operator perspective if the DS is disabled.
         # This ensures driving behavior doesn't change until an explicit disable event occurs during testing.
         if not self._has_applied_operator_perspective or DriverStation.isDisabled():
-            alliance_color = DriverStation.getAlliance()
-            if alliance_color is not None:
+            if field.alliance is not None:
                 self.set_operator_perspective_forward(
                     self._RED_ALLIANCE_PERSPECTIVE_ROTATION
-                    if alliance_color == DriverStation.Alliance.kRed
+                    if field.is_red
                     else self._BLUE_ALLIANCE_PERSPECTIVE_ROTATION
                 )
                 self._has_applied_operator_perspective = True
 
-        # Update robot velocity and acceleration.
-        if self.lookahead_active:
-            self.vel_acc_periodic()
-
-        # Update PhotonVision cameras in real-life scenarios.
-        if self.photon_cam_array[0].isConnected() and not utils.is_simulation():
-            self.update_2d_solution()
+        self.drain_vision()
+
+    def update_vision(self) -> None:
+        """Publishes vision outputs. Runs at the camera frame rate rather than every loop; the camera results
+        themselves are read by the vision worker threads."""
+        if self.vision_recorder is not None:
+            self.vision_recorder.flush()
+        if not self.dashboard_shed:
+            if utils.is_simulation():
+                SmartDashboard.putBoolean("Target in View", self.target_in_view)
+                SmartDashboard.putNumber("Target ID", self.target_id)
             SmartDashboard.putNumber("Target Yaw", self.target_yaw)
-            SmartDashboard.putNumber("Target Range (in)", metersToInches(self.target_range))
-        #    self.select_best_vision_pose((0.2, 0.2, 9999999999999999999))
-
-        # If in simulation, update PhotonVision for sim.
-        if utils.is_simulation():
-            self.vision_sim.update(self.get_pose())
-            self.update_2d_solution()
-            SmartDashboard.putBoolean("Target in View", self.target_in_view)
-            SmartDashboard.putNumber("Target ID", self.target_id)
-            SmartDashboard.putNumber("Target Yaw", self.target_yaw)
-            SmartDashboard.putNumber("Target Range (in)", metersToInches(self.target_range))
-        #    self.select_best_vision_pose((1.5, 1.5, 9999999999999999999))
-
-    def update_2d_solution(self) -> None:
-        for i in self.photon_cam_array:
-            best_target = i.getLatestResult().getBestTarget()
-            if best_target is not None:
-                self.target_in_view = True
-                self.target_id = best_target.fiducialId
-                if best_target.fiducialId in self.used_tags:
-                    self.target_yaw = best_target.yaw
-                    self.target_range = self.get_range_from_2d_solution(best_target.pitch)
-            else:
-                self.target_in_view = False
-
-
-    def get_range_from_2d_solution(self, target_offset_angle: float) -> float:
-        target_height_in = 8  # TODO CHANGE THESE TO CONSTANTS
-        camera_height_in = 6  # TODO CHANGE THESE TO CONSTANTS
-        camera_mounting_angle = 0 # TODO CHANGE THESE TO CONSTANTS
-
-        angle_to_goal = degreesToRadians(camera_mounting_angle + target_offset_angle)
-
-        return inchesToMeters((target_height_in - camera_height_in) / math.tan(angle_to_goal))
-
-
-    def select_best_vision_pose(self, stddevs: (float, float, float)) -> None:
-        accepted_poses = []
-        accepted_targets = []
-        for i in range(0, len(self.photon_cam_array)):
-            estimated_pose = self.photon_pose_array[i].update()
-            best_target_yeehaw = self.photon_cam_array[i].getLatestResult()
-            best_target = best_target_yeehaw.getBestTarget()
-            if best_target is not None:
-                if best_target_yeehaw.getBestTarget().fiducialId not in self.used_tags:
-                    for k in best_target_yeehaw.getTargets():
-                        if k is not None:
-                            if k.fiducialId in self.used_tags:
-                                best_target = k
-            if estimated_pose is not None:
-                estimated_pose = estimated_pose.estimatedPose
-                if best_target is not None:
-                    if (0 < estimated_pose.x < 17.658 and 0 < estimated_pose.y < 8.131 and -0.03 <= estimated_pose.z <= 0.03 and
-                       best_target.fiducialId in self.used_tags and
-                            math.sqrt(math.pow(best_target.bestCameraToTarget.x, 2) +
-                                      math.pow(best_target.bestCameraToTarget.y, 2)) < 4):
-                        accepted_poses.append(estimated_pose)
-                        accepted_targets.append(best_target_yeehaw)
-                        self.target_yaw = best_target.getYaw()
-                        self.target_id = best_target.fiducialId
-
-        if accepted_poses:
-            SmartDashboard.putBoolean("Accepted new pose?", True)
-            self.tag_seen = True
-            for i in range(0, len(accepted_poses)):
-                self.add_vision_measurement(accepted_poses[i].toPose2d(), utils.fpga_to_current_time(accepted_targets[i].getTimestampSeconds()), stddevs)
-        else:
-            self.tag_seen = False
-            SmartDashboard.putBoolean("Accepted new pose?", False)
+            SmartDashboard.putNumber("Target Range From Center (in)", metersToInches(self.target_range))
+            self.cameras.publish_stats()
+            self.vision_model.refresh_tunables()
+            self.vision_gate.refresh_tunables()
+
+    def drain_vision(self) -> None:
+        """Applies every frame the camera workers (or the vision process) have produced since the last loop,
+        oldest first."""
+        if VisionConstants.use_process:
+            self.cameras.set_tag_mask(self.vision.used_tag_mask)
+        frames = self.cameras.drain()
+        if self.vision_recorder is not None:
+            for frame in frames:
+                self.vision_recorder.record_frame(frame)
+
+        if self.vision.process(frames, utils.get_current_time_seconds()) and VisionConstants.fuse_poses:
+            SmartDashboard.putBoolean("Accepted new pose?", self.vision.tag_seen)
+
+    @property
+    def tag_seen(self) -> bool:
+        return self.vision.tag_seen
+
+    @property
+    def target_yaw(self) -> float:
+        return self.vision.target_yaw
+
+    @property
+    def target_range(self) -> float:
+        return self.vision.target_range
+
+    @property
+    def target_id(self) -> int:
+        return self.vision.target_id
+
+    @property
+    def target_in_view(self) -> bool:
+        return self.vision.target_in_view
+
+    def reset_pose_from_vision(self, stddevs: tuple[float, float, float]) -> None:
+        """Fuses the next vision pose that passes screening with the given std-devs, skipping the odometry gate.
+        Only a frame captured within the target timeout of the call counts."""
+        now = utils.get_current_time_seconds()
+        self.vision.reset_from_next_pose(stddevs, now)
+        if self.vision_recorder is not None:
+            self.vision_recorder.record_reset(now, stddevs)
+
+    def set_dashboard_shed(self, shedding: bool) -> None:
+        """Stops the vision SmartDashboard outputs while the robot loop is overloaded."""
+        self.dashboard_shed = shedding
 
     def set_used_tags(self, tags: str):
-        if tags == "red_reef":
-            self.used_tags = [6, 7, 8, 9, 10, 11]
-        elif tags == "blue_reef":
-            self.used_tags = [17, 18, 19, 20, 21, 22]
-        elif tags == "border":
-            self.used_tags = [6, 7, 8, 9, 10, 11, 17, 18, 19, 20, 21, 22]
-        else:
-            self.used_tags = [6, 7, 8, 9, 10, 11, 17, 18, 19, 20, 21, 22]
+        """Selects a precomputed tag filter: "red_reef", "blue_reef", or anything else for every reef tag."""
+        self._set_used_tag_mask(self.tag_index.filter(tags))
 
     def set_lockout_tag(self, tag: int) -> None:
-        self.used_tags = [tag]
+        self._set_used_tag_mask(1 << tag)
+
+    def _set_used_tag_mask(self, mask: int) -> None:
+        """Changes the tag filter, logging the change so a replay filters the same frames."""
+        self.vision.used_tag_mask = mask
+        if self.vision_recorder is not None:
+            self.vision_recorder.record_tag_mask(utils.get_current_time_seconds(), mask)
+
+    def get_used_tags(self) -> list[int]:
+        return self.tag_index.ids_in(self.vision.used_tag_mask)
 
     def set_lookahead(self, on: bool) -> None:
         self.lookahead_active = on
 
-    def vel_acc_periodic(self) -> None:
-        """Calculates the instantaneous robot velocity and acceleration."""
-        self.vx_new, self.vy_new, self.omega_new = self.get_field_relative_velocity()
-        self.vx_robot_new, self.vy_robot_new, self.omega_robot_new = self.get_robot_relative_velocity()
-        self.ax, self.ay, self.alpha = self.get_field_relative_acceleration([self.vx_new, self.vy_new, self.omega_new],
-                                                                            [self.vx_old, self.vy_old, self.omega_old],
-                                                                            utils.get_current_time_seconds() - self.loop_time)
-        self.ax_robot, self.ay_robot, self.alpha_robot = (
-            self.get_field_relative_acceleration([self.vx_robot_new, self.vy_robot_old, self.omega_robot_new],
-                                                 [self.vx_robot_old, self.vy_robot_old, self.omega_robot_old],
-                                                 utils.get_current_time_seconds() - self.loop_time))
-
-        self.vx_old = self.vx_new
-        self.vy_old = self.vy_new
-        self.omega_old = self.omega_new
-        self.vx_robot_old = self.vx_robot_new
-        self.vy_robot_old = self.vy_robot_new
-        self.omega_robot_old = self.omega_robot_new
-
-        self.loop_time = utils.get_current_time_seconds()
-        # SmartDashboard.putNumber("Robot Linear Speed", math.sqrt((self.vx_new * self.vx_new) + (self.vy_new * self.vy_new)))
-        # SmartDashboard.putNumber("Robot Heading", self.get_pose().rotation().degrees())
+    def register_telemetry(self, telemetry_function: Callable[[swerve.SwerveDrivetrain.SwerveDriveState], None] | None):
+        """
+        Register a function called with every odometry update. Phoenix only keeps one callback, so the velocity
+        estimator and pose history are always fed first and the given function (if any) is called after them.
+
+        :param telemetry_function: Function to call with each new state, or None for the estimator alone
+        """
+        estimator = self.kinematic_estimator
+        history = self.pose_history
+
+        def telemetry(state: swerve.SwerveDrivetrain.SwerveDriveState) -> None:
+            estimator.update(state)
+            estimate = estimator.estimate
+            raw_heading = state.raw_heading.radians()
+            history.add(state.timestamp, state.pose, raw_heading, estimate.vx, estimate.vy, estimate.omega)
+            if self.vision_recorder is not None:
+                self.vision_recorder.record_odometry(state.timestamp, state.pose, raw_heading, estimate.vx,
+                                                     estimate.vy, estimate.omega)
+            if telemetry_function is not None:
+                telemetry_function(state)
+
+        swerve.SwerveDrivetrain.register_telemetry(self, telemetry)
+
+    def refresh_snapshot(self) -> None:
+        """Reads the drivetrain state and the latest filtered velocity and acceleration once. Called at the start
+        of every robot loop, before the scheduler runs."""
+        state = self.get_state()
+        estimate = self.kinematic_estimator.estimate
+        snapshot = self.snapshot
+
+        snapshot.timestamp = state.timestamp
+        snapshot.pose = state.pose
+        snapshot.raw_heading = state.raw_heading.radians()
+        snapshot.speeds = state.speeds
+        snapshot.vx = estimate.vx
+        snapshot.vy = estimate.vy
+        snapshot.omega = estimate.omega
+        snapshot.ax = estimate.ax
+        snapshot.ay = estimate.ay
+        snapshot.alpha = estimate.alpha
+        snapshot.ax_robot = estimate.ax_robot
+        snapshot.ay_robot = estimate.ay_robot
+        snapshot.alpha_robot = estimate.alpha_robot
+        if not self.dashboard_shed:
+            self.kinematic_estimator.publish()
 
     def get_field_relative_velocity(self) -> [float, float, float]:
         """Returns the instantaneous velocity of the robot."""
-        return self.get_chassis_speeds().vx * self.get_pose().rotation().cos() - \
-            self.get_chassis_speeds().vy * self.get_pose().rotation().sin(), \
-            self.get_chassis_speeds().vy * self.get_pose().rotation().cos() + \
-            self.get_chassis_speeds().vx * self.get_pose().rotation().sin(), self.get_chassis_speeds().omega
+        return self.snapshot.vx, self.snapshot.vy, self.snapshot.omega
 
     def get_robot_relative_velocity(self) -> [float, float, float]:
-        return self.get_chassis_speeds().vx, self.get_chassis_speeds().vy, self.get_chassis_speeds().omega
+        speeds = self.snapshot.speeds
+        return speeds.vx, speeds.vy, speeds.omega
 
     def get_angular_velocity(self) -> float:
         """Returns the instantaneous angular velocity of the robot."""
-        return self.get_chassis_speeds().omega
-
-    def get_field_relative_acceleration(self, new_speed, old_speed, time: float) -> [float, float, float]:
-        """Returns the instantaneous acceleration of the robot."""
-        ax = (new_speed[0] - old_speed[0]) / time
-        ay = (new_speed[1] - old_speed[1]) / time
-        alpha = (new_speed[2] - old_speed[2]) / time
-
-        if abs(ax) > 6.0:
-            ax = 6.0 * math.copysign(1, ax)
-        if abs(ay) > 6.0:
-            ay = 6.0 * math.copysign(1, ay)
-        if abs(alpha) > 4 * math.pi:
-            alpha = 4 * math.pi * math.copysign(1, alpha)
+        return self.snapshot.omega
 
-        return ax, ay, alpha
+    def get_field_relative_acceleration(self) -> [float, float, float]:
+        """Returns the filtered acceleration of the robot."""
+        return self.snapshot.ax, self.snapshot.ay, self.snapshot.alpha
 
     def _start_sim_thread(self):
         def _sim_periodic():
@@ -520,12 +577,26 @@ class CommandSwerveDrivetrain(Subsystem, swerve.SwerveDrivetrain):
     def sys_id_steer_dynamic(self, direction: sysid.SysIdRoutine.Direction) -> Command:
         return self.sys_id_routine_steer.dynamic(direction)
 
-    def get_chassis_speeds(self):
-        return AutoConstants.kinematics.toChassisSpeeds(self.get_state().module_states)
+    def get_chassis_speeds(self) -> ChassisSpeeds:
+        """Returns the robot-relative chassis speeds from this loop's snapshot."""
+        return self.snapshot.speeds
 
     def get_pose(self) -> Pose2d:
-        """Returns the robot pose."""
-        return self.get_state().pose
+        """Returns the robot pose from this loop's snapshot."""
+        return self.snapshot.pose
+
+    def reset_pose(self, pose: Pose2d) -> None:
+        """Resets odometry and the snapshot, so code later in the same loop sees the new pose. Pose history from
+        before the reset no longer matches the field and is dropped."""
+        swerve.SwerveDrivetrain.reset_pose(self, pose)
+        self.snapshot.pose = pose
+        self.pose_history.clear()
+
+    def get_pose_at(self, timestamp: float) -> Pose2d:
+        """Returns the odometry pose at a past timestamp (in the get_current_time_seconds() timebase), falling back
+        to the current pose when there is no history."""
+        pose = self.pose_history.sample(timestamp)
+        return pose if pose is not None else self.get_pose()
 
     def set_rotation(self, angle: float) -> None:
         self.reset_pose(Pose2d(self.get_pose().translation(), Rotation2d.fromDegrees(angle)))
@@ -548,7 +619,7 @@ class CommandSwerveDrivetrain(Subsystem, swerve.SwerveDrivetrain):
                 AutoConstants.speed_at_12_volts,
             ),
             self.config,
-            lambda: DriverStation.getAlliance() == DriverStation.Alliance.kRed,
+            lambda: field.is_red,
             self
         )
 
@@ -569,10 +640,7 @@ class CommandSwerveDrivetrain(Subsystem, swerve.SwerveDrivetrain):
 
     def get_goal_alignment_heading(self) -> float:
         """Returns the required target heading to point at a goal."""
-        if DriverStation.getAlliance() == DriverStation.Alliance.kRed:
-            return self.get_auto_lookahead_heading([13.058, 4.014], 0.3)
-        else:
-            return self.get_auto_lookahead_heading([4.485, 4.014], 0.3)
+        return self.get_auto_lookahead_heading(field.get("goal"))
 
     def set_pathplanner_rotation_override(self, override: str) -> None:
         """Sets whether pathplanner uses an alternate heading controller."""
@@ -583,13 +651,17 @@ class CommandSwerveDrivetrain(Subsystem, swerve.SwerveDrivetrain):
         current_pose = self.get_pose()
         return math.atan2(target[1] - current_pose.y, target[0] - current_pose.x) * 180 / math.pi
 
-    def get_auto_lookahead_heading(self, target: [float, float], time_compensation: float) -> float:
-        """Acquires the target heading required to point at a goal while the robot is in motion."""
+    def get_auto_lookahead_heading(self, target: [float, float]) -> float:
+        """Acquires the target heading required to score on a goal while the robot is in motion."""
+        return self.solve_shot(target).heading
+
+    def solve_shot(self, target: [float, float]) -> ShotSolution:
+        """Solves a moving shot at a goal. Uses the newest odometry-rate velocity and acceleration estimate rather
+        than the loop snapshot to keep the lead as fresh as possible."""
         current_pose = self.get_pose()
-        adjusted_pose = Pose2d(current_pose.x + self.vx_new * time_compensation,
-                               current_pose.y + self.vy_new * time_compensation,
-                               current_pose.rotation() + Rotation2d(self.omega_new * time_compensation))
-        return math.atan2(target[1] - adjusted_pose.y, target[0] - adjusted_pose.x) * 180 / math.pi
+        estimate = self.kinematic_estimator.estimate
+        return self.shot_solver.solve(target, current_pose.x, current_pose.y, estimate.vx, estimate.vy,
+                                      estimate.ax, estimate.ay)
 
     def pathfind_to_pose(self, target: [float, float, float]):
         """Command for pathfinding between current pose and a target pose in teleoperated."""
@@ -603,25 +675,23 @@ class CommandSwerveDrivetrain(Subsystem, swerve.SwerveDrivetrain):
         )
 
     def get_close_to_target(self, target: [float, float], good_range: float) -> bool:
-        pose = [self.get_pose().x, self.get_pose().y]
+        current_pose = self.get_pose()
+        pose = [current_pose.x, current_pose.y]
         c = math.sqrt(((target[0] - pose[0]) * (target[0] - pose[0])) + ((target[1] - pose[1]) * (target[1] - pose[1])))
         return good_range >= c
 
     def reset_odometry(self):
         """Reset robot odometry at the Subwoofer."""
-        if DriverStation.getAlliance() == DriverStation.Alliance.kRed:
-            self.reset_pose(Pose2d(14.337, 4.020, Rotation2d.fromDegrees(180)))
-            self.set_operator_perspective_forward(Rotation2d.fromDegrees(180))
-        else:
-            self.reset_pose(Pose2d(3.273, 4.020, Rotation2d.fromDegrees(0)))
-            self.set_operator_perspective_forward(Rotation2d.fromDegrees(0))
+        x, y, heading = field.get("reset_pose")
+        self.reset_pose(Pose2d(x, y, Rotation2d.fromDegrees(heading)))
+        self.set_operator_perspective_forward(Rotation2d.fromDegrees(heading))
 
     def reset_clt(self) -> None:
         self.re_entered_clt = True
 
     def drive_clt(self, x_speed: float, y_speed: float, turn_amount: float) -> swerve.requests:
         if self.re_entered_clt:
-            if DriverStation.getAlliance() == DriverStation.Alliance.kRed:
+            if field.is_red:
                 self.target_direction = Rotation2d.fromDegrees(self.get_pose().rotation().degrees() + 180)
             else:
                 self.target_direction = self.get_pose().rotation()
@@ -637,15 +707,33 @@ class CommandSwerveDrivetrain(Subsystem, swerve.SwerveDrivetrain):
     def set_clt_target_direction(self, direction: Rotation2d) -> None:
         self.target_direction = direction
 
+    def get_visible_target(self, tag_id: int) -> TargetRange | None:
+        """Returns the robot-relative position of a tag in the current alignment frames, stamped with its capture
+        time, or None if no alignment camera sees it."""
+        return self.vision.visible_targets.get(tag_id)
+
+    def get_compensated_target_yaw(self) -> float | None:
+        """Returns the target yaw corrected for the gyro rotation since the frame was captured, or None once the
+        target has not been seen for the target timeout."""
+        return self.vision.target_tracker.get_yaw(utils.get_current_time_seconds(), self.snapshot.raw_heading)
+
     def profiled_rotation_to_vis_target(self) -> swerve.requests:
+        yaw = self.get_compensated_target_yaw()
+        if yaw is None:
+            # Target lost, stop turning and restart the profile if it comes back.
+            self.ptttc_needs_reset = True
+            return self.ptttc_request.with_rotational_rate(0)
+        if self.ptttc_needs_reset:
+            self.ptttc.reset(yaw)
+            self.ptttc_needs_reset = False
         if self.ptttc.atGoal():
             return self.brake_request
         else:
             return (self.ptttc_request
-                    .with_rotational_rate(self.ptttc.calculate(self.target_yaw)))
+                    .with_rotational_rate(self.ptttc.calculate(yaw)))
 
     def reset_profiled_rotation(self) -> None:
-        self.ptttc.reset(0)
+        self.ptttc_needs_reset = True
 
 
 class ResetCLT(Command):
@@ -682,7 +770,7 @@ class SetCLTTarget(Command):
         self.target = target
 
     def initialize(self):
-        if DriverStation.getAlliance() == DriverStation.Alliance.kBlue:
+        if field.alliance == DriverStation.Alliance.kBlue:
             self.drive.set_clt_target_direction(self.target)
         else:
             self.drive.set_clt_target_direction(self.target + Rotation2d.fromDegrees(180))
@@ -121,6 +121,8 @@ class FlywheelSubsystem(Subsystem):
         if is_simulation():
             self.update_sim()
 
+    def publish_dashboard(self) -> None:
+        """Publish flywheel status. Runs at the dashboard rate instead of every loop."""
         SmartDashboard.putNumber("Flywheel Velocity", self.get_velocity())
         SmartDashboard.putBoolean("Flywheel at Speed", self.get_at_target())
         SmartDashboard.putNumber("Time Since Setpoint Activated", get_current_time_seconds() - self.setpoint_enabled_time)
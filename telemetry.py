@@ -15,6 +15,7 @@ class Telemetry:
         :type max_speed: units.meters_per_second
         """
         self._max_speed = max_speed
+        self._shedding = False
         # SignalLogger.start()
 
         # What to publish over networktables for telemetry
@@ -82,7 +83,8 @@ class Telemetry:
         """
         Accept the swerve drive state and telemeterize it to SmartDashboard and SignalLogger.
         """
-        self._traj_pub.set(self.traj_field.getObject('path').getPoses())
+        if not self._shedding:
+            self._traj_pub.set(self.traj_field.getObject('path').getPoses())
 
         # Telemeterize the swerve drive state
         self._drive_pose.set(state.pose)
@@ -117,7 +119,13 @@ class Telemetry:
         self._field_pub.set(pose_array)
 
         # Telemeterize the module states to a Mechanism2d
+        if self._shedding:
+            return
         for i, module_state in enumerate(state.module_states):
             self._module_speeds[i].setAngle(module_state.angle.degrees())
             self._module_directions[i].setAngle(module_state.angle.degrees())
             self._module_speeds[i].setLength(module_state.speed / (2 * self._max_speed))
+
+    def set_shedding(self, shedding: bool) -> None:
+        """Skip the trajectory and Mechanism2d updates while the robot loop is overloaded."""
+        self._shedding = shedding